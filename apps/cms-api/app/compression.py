@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+import threading
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cache import BytesLRUCache
+from .config import settings
+from .sites import SITES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+SAFE_METHODS = {"GET", "HEAD"}
+# Bodies at least this large are compressed in the threadpool, off the event loop.
+THREADPOOL_MIN_BYTES = 64 * 1024
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    compressors: dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        compressors["zstd"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    if brotli is not None:
+        compressors["br"] = lambda data: brotli.compress(data, quality=5)
+    compressors["gzip"] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+    return compressors
+
+
+# Server preference order; the client only decides which of them it accepts.
+COMPRESSORS = _compressors()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in COMPRESSORS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.by_encoding: dict[str, dict[str, int]] = {}
+
+    def record(self, encoding: str, original: int, compressed: int, cache_hit: bool) -> None:
+        with self._lock:
+            self.responses += 1
+            self.cache_hits += int(cache_hit)
+            self.bytes_in += original
+            self.bytes_out += compressed
+            bucket = self.by_encoding.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            bucket["responses"] += 1
+            bucket["bytes_in"] += original
+            bucket["bytes_out"] += compressed
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "cache_hits": self.cache_hits,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "by_encoding": {name: dict(values) for name, values in self.by_encoding.items()},
+            }
+
+
+COMPRESSION_METRICS = CompressionMetrics()
+COMPRESSION_RESOURCE = "compression"
+SITE_PATH_PATTERN = re.compile(r"^/api/v1/sites/([A-Za-z0-9_-]+)/")
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli/zstd compression with a cache of compressed bodies.
+
+    Responses are tagged with a strong ETag derived from the body (suffixed with
+    the content-coding for compressed representations), which is also the
+    cache key: re-reading an unchanged document or listing page reuses the
+    stored compressed bytes instead of compressing again, and a matching
+    `If-None-Match` is answered with 304. Only GET and HEAD responses are
+    handled; other methods pass through untouched. Each site has its own
+    cache, held as a site resource so it counts toward the site's memory budget.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, cache_bytes: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache_bytes = cache_bytes
+
+    def _cache(self, path: str) -> BytesLRUCache | None:
+        match = SITE_PATH_PATTERN.match(path)
+        state = SITES.states.get(match.group(1) if match else settings.default_site_id)
+        if state is None:
+            return None
+        return state.resource(COMPRESSION_RESOURCE, lambda config: BytesLRUCache(self.cache_bytes))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Only safe methods are buffered and tagged: a 304 to a write would
+        # hide the fact that the mutation already ran.
+        if scope["type"] != "http" or scope["method"] not in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if_none_match = request_headers.get("if-none-match")
+        start_message: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def buffered_send(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    message["status"] != 200
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_buffered(send, start_message, b"".join(chunks), encoding, if_none_match, scope["path"])
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _send_buffered(
+        self,
+        send: Send,
+        start_message: Message | None,
+        body: bytes,
+        encoding: str | None,
+        if_none_match: str | None,
+        path: str,
+    ) -> None:
+        assert start_message is not None
+        headers = MutableHeaders(raw=start_message["headers"])
+        base_etag = headers.get("etag") or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if encoding is not None and len(body) < self.minimum_size:
+            encoding = None
+        # Each content-coding is a different byte sequence, so it gets its own tag.
+        etag = f'{base_etag[:-1]}-{encoding}"' if encoding is not None and base_etag.endswith('"') else base_etag
+        headers["etag"] = etag
+        headers.add_vary_header("Accept-Encoding")
+
+        if if_none_match and etag in {value.strip().removeprefix("W/") for value in if_none_match.split(",")}:
+            del headers["content-length"]
+            await send({**start_message, "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding is None:
+            headers["content-length"] = str(len(body))
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        cache_key = f"{encoding}:{base_etag}"
+        cache = self._cache(path)
+        compressed = cache.get(cache_key) if cache is not None else None
+        cache_hit = compressed is not None
+        if compressed is None:
+            if len(body) >= THREADPOOL_MIN_BYTES:
+                compressed = await run_in_threadpool(COMPRESSORS[encoding], body)
+            else:
+                compressed = COMPRESSORS[encoding](body)
+            if cache is not None:
+                cache.put(cache_key, compressed)
+        COMPRESSION_METRICS.record(encoding, len(body), len(compressed), cache_hit)
+
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(compressed))
+        await send({**start_message, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": compressed})
+
@@ -1,23 +1,138 @@
 from __future__ import annotations
 
 import os
+from contextvars import ContextVar
+from dataclasses import dataclass
 from pathlib import Path
 
+import yaml
+
+CURRENT_SITE_ID: ContextVar[str | None] = ContextVar("cms_current_site_id", default=None)
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    id: str
+    blog_root: Path
+    db_path: Path
+    git_branch: str
+    git_remote: str
+    git_remote_url: str
+    git_token: str
+    history_cache_bytes: int
+    memory_budget_bytes: int
+
 
 class Settings:
     def __init__(self) -> None:
-        self.blog_root = Path(os.getenv("CMS_BLOG_ROOT", "/workspace/blog")).resolve()
-        self.db_path = Path(os.getenv("CMS_DB_PATH", "/data/app.db"))
+        self.auth_db_path = Path(os.getenv("CMS_DB_PATH", "/data/app.db"))
         self.admin_user = os.getenv("CMS_ADMIN_USER", "admin")
         self.admin_password_hash = os.getenv("CMS_ADMIN_PASSWORD_HASH", "")
         self.jwt_secret = os.getenv("CMS_JWT_SECRET", "change-me")
         self.jwt_expire_hours = int(os.getenv("CMS_JWT_EXPIRE_HOURS", "8"))
         self.allowed_origin = os.getenv("CMS_ALLOWED_ORIGIN", "http://localhost:8080")
-        self.git_branch = os.getenv("CMS_GIT_BRANCH", "main")
-        self.git_remote = os.getenv("CMS_GIT_REMOTE", "origin")
-        self.git_remote_url = os.getenv("CMS_GIT_REMOTE_URL", "")
-        self.git_token = os.getenv("CMS_GIT_TOKEN", "")
         self.secure_cookie = os.getenv("CMS_SECURE_COOKIE", "true").lower() == "true"
+        self.validation_workers = int(os.getenv("CMS_VALIDATION_WORKERS", "4"))
+        self.bulk_workers = int(os.getenv("CMS_BULK_WORKERS", "4"))
+        self.upload_max_bytes = int(os.getenv("CMS_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+        self.upload_max_concurrency = int(os.getenv("CMS_UPLOAD_MAX_CONCURRENCY", "2"))
+        self.upload_allowed_types = {
+            value.strip()
+            for value in os.getenv(
+                "CMS_UPLOAD_ALLOWED_TYPES",
+                "image/png,image/jpeg,image/gif,image/webp,application/pdf",
+            ).split(",")
+            if value.strip()
+        }
+        self.history_cache_bytes = int(os.getenv("CMS_HISTORY_CACHE_BYTES", str(32 * 1024 * 1024)))
+        self.site_memory_budget_bytes = int(os.getenv("CMS_SITE_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+        self.compression_min_bytes = int(os.getenv("CMS_COMPRESSION_MIN_BYTES", "1024"))
+        self.compression_cache_bytes = int(os.getenv("CMS_COMPRESSION_CACHE_BYTES", str(16 * 1024 * 1024)))
+        self.autosave_debounce_seconds = float(os.getenv("CMS_AUTOSAVE_DEBOUNCE_SECONDS", "5"))
+        self.autosave_max_delay_seconds = float(os.getenv("CMS_AUTOSAVE_MAX_DELAY_SECONDS", "30"))
+        self.linkcheck_concurrency = int(os.getenv("CMS_LINKCHECK_CONCURRENCY", "16"))
+        self.linkcheck_per_host = int(os.getenv("CMS_LINKCHECK_PER_HOST", "2"))
+        self.linkcheck_timeout_seconds = float(os.getenv("CMS_LINKCHECK_TIMEOUT_SECONDS", "10"))
+        self.linkcheck_ttl_ok_hours = float(os.getenv("CMS_LINKCHECK_TTL_OK_HOURS", "168"))
+        self.linkcheck_ttl_failed_hours = float(os.getenv("CMS_LINKCHECK_TTL_FAILED_HOURS", "24"))
+        self.linkcheck_recheck_interval_seconds = int(os.getenv("CMS_LINKCHECK_RECHECK_INTERVAL_SECONDS", "0"))
+        self.related_min_score = float(os.getenv("CMS_RELATED_MIN_SCORE", "0.05"))
+        self.git_sync_interval_seconds = int(os.getenv("CMS_GIT_SYNC_INTERVAL_SECONDS", "0"))
+        self.site_idle_seconds = int(os.getenv("CMS_SITE_IDLE_SECONDS", "900"))
+        self.sites = self._load_sites(os.getenv("CMS_SITES_FILE", ""))
+        self.default_site_id = os.getenv("CMS_DEFAULT_SITE", next(iter(self.sites)))
+
+    def _load_sites(self, sites_file: str) -> dict[str, SiteConfig]:
+        """Read the site registry; without `CMS_SITES_FILE` the env describes a single `default` site.
+
+        The file is a YAML (or JSON) list of sites. Each entry needs `id` and
+        `blog_root`; the remaining keys fall back to the `CMS_*` variables, and
+        `db_path` defaults to `<id>.db` next to `CMS_DB_PATH`.
+        """
+        default = SiteConfig(
+            id="default",
+            blog_root=Path(os.getenv("CMS_BLOG_ROOT", "/workspace/blog")).resolve(),
+            db_path=self.auth_db_path,
+            git_branch=os.getenv("CMS_GIT_BRANCH", "main"),
+            git_remote=os.getenv("CMS_GIT_REMOTE", "origin"),
+            git_remote_url=os.getenv("CMS_GIT_REMOTE_URL", ""),
+            git_token=os.getenv("CMS_GIT_TOKEN", ""),
+            history_cache_bytes=self.history_cache_bytes,
+            memory_budget_bytes=self.site_memory_budget_bytes,
+        )
+        if not sites_file:
+            return {default.id: default}
+
+        entries = yaml.safe_load(Path(sites_file).read_text(encoding="utf-8")) or []
+        sites: dict[str, SiteConfig] = {}
+        for entry in entries:
+            site_id = str(entry["id"])
+            sites[site_id] = SiteConfig(
+                id=site_id,
+                blog_root=Path(entry["blog_root"]).resolve(),
+                db_path=Path(entry.get("db_path") or self.auth_db_path.parent / f"{site_id}.db"),
+                git_branch=entry.get("git_branch", default.git_branch),
+                git_remote=entry.get("git_remote", default.git_remote),
+                # The PAT belongs to its remote URL: a site never inherits the
+                # default site's token, so without its own pair it uses `git_remote`.
+                git_remote_url=entry.get("git_remote_url", ""),
+                git_token=entry.get("git_token", ""),
+                history_cache_bytes=int(entry.get("history_cache_bytes", default.history_cache_bytes)),
+                memory_budget_bytes=int(entry.get("memory_budget_bytes", default.memory_budget_bytes)),
+            )
+            if sites[site_id].git_token and not sites[site_id].git_remote_url:
+                raise ValueError(f"Site '{site_id}' sets git_token without git_remote_url")
+        if not sites:
+            raise ValueError("CMS_SITES_FILE must list at least one site")
+        return sites
+
+    @property
+    def site(self) -> SiteConfig:
+        return self.sites[CURRENT_SITE_ID.get() or self.default_site_id]
+
+    @property
+    def blog_root(self) -> Path:
+        return self.site.blog_root
+
+    @property
+    def db_path(self) -> Path:
+        return self.site.db_path
+
+    @property
+    def git_branch(self) -> str:
+        return self.site.git_branch
+
+    @property
+    def git_remote(self) -> str:
+        return self.site.git_remote
+
+    @property
+    def git_remote_url(self) -> str:
+        return self.site.git_remote_url
+
+    @property
+    def git_token(self) -> str:
+        return self.site.git_token
 
     @property
     def notes_dir(self) -> Path:
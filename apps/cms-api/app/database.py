@@ -7,17 +7,17 @@ from pathlib import Path
 from .config import settings
 
 
-def _connect() -> sqlite3.Connection:
-    db_parent = Path(settings.db_path).parent
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_parent = Path(db_path).parent
     db_parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(settings.db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     return conn
 
 
 @contextmanager
-def get_connection() -> sqlite3.Connection:
-    conn = _connect()
+def _connection(db_path: Path) -> sqlite3.Connection:
+    conn = _connect(db_path)
     try:
         yield conn
         conn.commit()
@@ -25,8 +25,18 @@ def get_connection() -> sqlite3.Connection:
         conn.close()
 
 
+def get_connection(db_path: Path | None = None) -> sqlite3.Connection:
+    """Connection to the database of the site handling the current request, or to `db_path`."""
+    return _connection(db_path or settings.db_path)
+
+
+def get_auth_connection() -> sqlite3.Connection:
+    """Connection to the database holding login sessions, shared by all sites."""
+    return _connection(settings.auth_db_path)
+
+
 def init_db() -> None:
-    with get_connection() as conn:
+    with get_auth_connection() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS sessions (
@@ -38,6 +48,13 @@ def init_db() -> None:
             )
             """
         )
+
+    for site in settings.sites.values():
+        init_site_db(site.db_path)
+
+
+def init_site_db(db_path: Path) -> None:
+    with _connection(db_path) as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS audit_logs (
@@ -62,3 +79,28 @@ def init_db() -> None:
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media_files (
+                hash TEXT NOT NULL,
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_media_files_hash ON media_files (hash)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS link_checks (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                http_status INTEGER,
+                final_url TEXT,
+                error TEXT,
+                checked_at TEXT NOT NULL,
+                next_check_at TEXT NOT NULL
+            )
+            """
+        )
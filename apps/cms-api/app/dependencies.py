@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 
 from fastapi import Cookie, Depends, Header, HTTPException, status
 
-from .database import get_connection
+from .database import get_auth_connection, get_connection
 from .security import decode_access_token, hash_token
 
 
@@ -39,7 +39,7 @@ def get_current_session(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token") from exc
 
     token_hash = hash_token(token)
-    with get_connection() as conn:
+    with get_auth_connection() as conn:
         row = conn.execute(
             """
             SELECT id, expires_at, revoked_at
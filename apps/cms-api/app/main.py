@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .compression import CompressionMiddleware
 from .config import settings
 from .database import init_db
-from .routers import auth, content, git, health
+from .responses import FastJSONResponse
+from .routers import auth, content, git, health, links, media, metrics, related, sites
+from .services.autosave import AUTOSAVE_FLUSHER
+from .services.git_sync import REMOTE_SYNCER
+from .services.link_checker import LINK_RECHECKER
+from .sites import SITE_EVICTOR, SITES, use_default_site, use_site
 
-app = FastAPI(title="LLMDev CMS API", version="0.1.0")
+app = FastAPI(title="LLMDev CMS API", version="0.1.0", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,14 +22,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    cache_bytes=settings.compression_cache_bytes,
+)
 
 
 @app.on_event("startup")
 def startup() -> None:
     init_db()
+    AUTOSAVE_FLUSHER.start()
+    REMOTE_SYNCER.start()
+    LINK_RECHECKER.start()
+    SITE_EVICTOR.start()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    SITE_EVICTOR.stop()
+    LINK_RECHECKER.stop()
+    REMOTE_SYNCER.stop()
+    AUTOSAVE_FLUSHER.stop()
+    SITES.close()
 
 
 app.include_router(health.router, prefix="/api/v1")
 app.include_router(auth.router, prefix="/api/v1")
-app.include_router(content.router, prefix="/api/v1")
-app.include_router(git.router, prefix="/api/v1")
+app.include_router(sites.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
+
+# Site-scoped routers are served under /api/v1/sites/{site_id}; the unprefixed
+# paths keep working for the default site.
+for site_router in (content.router, git.router, media.router, links.router, related.router):
+    app.include_router(site_router, prefix="/api/v1", dependencies=[Depends(use_default_site)])
+    app.include_router(site_router, prefix="/api/v1/sites/{site_id}", dependencies=[Depends(use_site)])
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value: Any) -> Any:
+    # YAML front matter may carry sets (!!set) or binary blobs (!!binary).
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    # Anything else means a payload no longer matches its schema; fail loudly.
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson-backed response used as the default response class of the API."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(payload: Any, status_code: int = 200) -> FastJSONResponse:
+    """Serialize a payload built by the service layer without re-validating it.
+
+    The service functions assemble documents and listings with the exact shape of
+    the response schemas, so running them through Pydantic again (once in the
+    router and once more in `response_model`) only burns CPU on large bodies.
+    Returning a response instance makes FastAPI skip the `response_model` pass;
+    the schema is still declared on the route for OpenAPI.
+    """
+    return FastJSONResponse(content=payload, status_code=status_code)
@@ -7,7 +7,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from ..config import settings
-from ..database import get_connection
+from ..database import get_auth_connection, get_connection
 from ..dependencies import AuthSession, require_auth
 from ..schemas import AuthMeResponse, LoginRequest, TokenResponse
 from ..security import create_access_token, hash_token, verify_password
@@ -79,7 +79,7 @@ def login(payload: LoginRequest, request: Request, response: Response) -> TokenR
     token, expires_at = create_access_token(settings.admin_user)
     token_hash = hash_token(token)
 
-    with get_connection() as conn:
+    with get_auth_connection() as conn:
         conn.execute(
             """
             INSERT INTO sessions (id, created_at, expires_at, revoked_at, token_hash)
@@ -104,7 +104,7 @@ def login(payload: LoginRequest, request: Request, response: Response) -> TokenR
 
 @router.post("/logout")
 def logout(response: Response, session: AuthSession = Depends(require_auth)) -> dict[str, str]:
-    with get_connection() as conn:
+    with get_auth_connection() as conn:
         conn.execute(
             """
             UPDATE sessions
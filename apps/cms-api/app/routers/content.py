@@ -3,18 +3,33 @@ from __future__ import annotations
 import json
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
 
 from ..database import get_connection
 from ..dependencies import AuthSession, require_auth
+from ..responses import trusted_response
 from ..schemas import (
+    AutosaveRequest,
+    AutosaveResponse,
+    BulkJobResponse,
+    BulkPreviewResponse,
+    BulkRewriteRequest,
     ContentCreateRequest,
+    ContentDiffResponse,
     ContentDocument,
+    ContentHistoryResponse,
     ContentListResponse,
+    ContentRevisionDocument,
     ContentType,
     ContentUpdateRequest,
 )
-from ..services.markdown import create_content, delete_content, get_content, list_content, update_content
+from ..services.autosave import get_autosave_store
+from ..services.bulk import get_bulk_jobs, preview, start_bulk_rewrite
+from ..services.git_history import diff_revisions, get_revision, list_revisions
+from ..services.link_index import check_duplicate_links, get_link_index
+from ..services.markdown import CONTENT_LOCK, create_content, delete_content, get_content, list_content, update_content
+from ..services.related import get_related_index
+from ..services.search_index import get_search_index
 
 router = APIRouter(prefix="/content", tags=["content"])
 
@@ -43,43 +58,139 @@ def get_content_list(
     query: str = Query(default=""),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
-) -> ContentListResponse:
+) -> Response:
     _ = session
     result = list_content(type, query, page, page_size)
-    return ContentListResponse(**result)
+    return trusted_response(result)
+
+
+@router.post("/bulk/preview", response_model=BulkPreviewResponse)
+def preview_bulk_rewrite(payload: BulkRewriteRequest, session: AuthSession = Depends(require_auth)) -> Response:
+    _ = session
+    return trusted_response(preview(payload.selector.model_dump(), payload.transform.model_dump()))
+
+
+@router.post("/bulk", response_model=BulkJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_bulk_rewrite_endpoint(payload: BulkRewriteRequest, session: AuthSession = Depends(require_auth)) -> BulkJobResponse:
+    job = start_bulk_rewrite(session.user, payload.selector.model_dump(), payload.transform.model_dump())
+    return BulkJobResponse(**job)
+
+
+@router.get("/bulk/{job_id}", response_model=BulkJobResponse)
+def get_bulk_rewrite(job_id: str, session: AuthSession = Depends(require_auth)) -> BulkJobResponse:
+    _ = session
+    return BulkJobResponse(**get_bulk_jobs().get(job_id).snapshot())
+
+
+@router.get("/{item_id:path}/history", response_model=ContentHistoryResponse)
+def get_content_history(
+    item_id: str,
+    session: AuthSession = Depends(require_auth),
+    limit: int = Query(default=50, ge=1, le=200),
+) -> Response:
+    _ = session
+    return trusted_response(list_revisions(item_id, limit))
+
+
+@router.get("/{item_id:path}/revisions/{revision}", response_model=ContentRevisionDocument)
+def get_content_revision(item_id: str, revision: str, session: AuthSession = Depends(require_auth)) -> Response:
+    _ = session
+    return trusted_response(get_revision(item_id, revision))
+
+
+@router.get("/{item_id:path}/diff", response_model=ContentDiffResponse)
+def get_content_diff(
+    item_id: str,
+    session: AuthSession = Depends(require_auth),
+    base: str = Query(...),
+    target: str | None = Query(default=None),
+) -> Response:
+    _ = session
+    return trusted_response(diff_revisions(item_id, base, target))
 
 
 @router.get("/{item_id:path}", response_model=ContentDocument)
-def get_content_by_id(item_id: str, session: AuthSession = Depends(require_auth)) -> ContentDocument:
+def get_content_by_id(item_id: str, session: AuthSession = Depends(require_auth)) -> Response:
+    _ = session
+    document = get_autosave_store().document(item_id) or get_content(item_id)
+    return trusted_response(document)
+
+
+@router.patch("/{item_id:path}/autosave", response_model=AutosaveResponse)
+def autosave_content(
+    item_id: str,
+    payload: AutosaveRequest,
+    session: AuthSession = Depends(require_auth),
+) -> AutosaveResponse:
+    deltas = [delta.model_dump() for delta in payload.deltas]
+    return AutosaveResponse(**get_autosave_store().apply(item_id, payload.base_version, deltas, session.user))
+
+
+@router.post("/{item_id:path}/flush", response_model=AutosaveResponse)
+def flush_content(
+    item_id: str,
+    session: AuthSession = Depends(require_auth),
+) -> AutosaveResponse:
     _ = session
-    document = get_content(item_id)
-    return ContentDocument(**document)
+    flushed = get_autosave_store().flush(item_id)
+    if not flushed:
+        current = get_content(item_id)
+        return AutosaveResponse(id=item_id, version=current["version"], dirty=False, pending_patches=0)
+    return AutosaveResponse(**flushed[0])
 
 
 @router.post("", response_model=ContentDocument, status_code=status.HTTP_201_CREATED)
-def create_content_endpoint(payload: ContentCreateRequest, session: AuthSession = Depends(require_auth)) -> ContentDocument:
+def create_content_endpoint(
+    payload: ContentCreateRequest,
+    background_tasks: BackgroundTasks,
+    session: AuthSession = Depends(require_auth),
+) -> Response:
     if not payload.title.strip():
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Title is required")
 
-    created = create_content(payload.model_dump())
+    # The duplicate check and the write are one step, so "reject" cannot race another save.
+    with CONTENT_LOCK:
+        duplicates = check_duplicate_links(payload.model_dump())
+        created = create_content(payload.model_dump())
+        get_link_index().update_document(created["id"], created["raw"])
     _register_audit(session.user, "content.create", created["path"], {"id": created["id"], "type": created["type"]})
-    return ContentDocument(**created)
+    background_tasks.add_task(get_search_index().update_document, created["id"])
+    background_tasks.add_task(get_related_index().update_document, created["id"])
+    return trusted_response({**created, "duplicate_links": duplicates}, status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/{item_id:path}", response_model=ContentDocument)
 def update_content_endpoint(
     item_id: str,
     payload: ContentUpdateRequest,
+    background_tasks: BackgroundTasks,
     session: AuthSession = Depends(require_auth),
-) -> ContentDocument:
-    updated = update_content(item_id, payload.model_dump())
+) -> Response:
+    # A full save supersedes the working copy; write it first so the update starts from it.
+    store = get_autosave_store()
+    store.flush(item_id)
+    store.drop(item_id)
+    with CONTENT_LOCK:
+        duplicates = check_duplicate_links(payload.model_dump(), exclude=item_id)
+        updated = update_content(item_id, payload.model_dump())
+        get_link_index().update_document(updated["id"], updated["raw"])
     _register_audit(session.user, "content.update", updated["path"], {"id": updated["id"]})
-    return ContentDocument(**updated)
+    background_tasks.add_task(get_search_index().update_document, updated["id"])
+    background_tasks.add_task(get_related_index().update_document, updated["id"])
+    return trusted_response({**updated, "duplicate_links": duplicates})
 
 
 @router.delete("/{item_id:path}")
-def delete_content_endpoint(item_id: str, session: AuthSession = Depends(require_auth)) -> dict[str, str]:
+def delete_content_endpoint(
+    item_id: str,
+    background_tasks: BackgroundTasks,
+    session: AuthSession = Depends(require_auth),
+) -> dict[str, str]:
     current = get_content(item_id)
+    get_autosave_store().drop(item_id)
     delete_content(item_id)
+    get_link_index().update_document(current["id"])
     _register_audit(session.user, "content.delete", current["path"], {"id": current["id"]})
+    background_tasks.add_task(get_search_index().update_document, current["id"])
+    background_tasks.add_task(get_related_index().update_document, current["id"])
     return {"status": "deleted"}
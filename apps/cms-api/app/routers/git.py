@@ -7,8 +7,10 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from ..database import get_connection
 from ..dependencies import AuthSession, require_auth
-from ..schemas import GitStatusItem, GitStatusResponse, PublishRequest, PublishResponse
+from ..schemas import GitStatusItem, GitStatusResponse, PublishRequest, PublishResponse, SyncResponse, ValidationReport
 from ..services.git_ops import get_status, publish
+from ..services.git_sync import register_sync, sync_remote
+from ..services.validation import validate_files
 
 router = APIRouter(prefix="/git", tags=["git"])
 
@@ -42,15 +44,29 @@ def git_status(session: AuthSession = Depends(require_auth)) -> GitStatusRespons
     return GitStatusResponse(changed=bool(files), files=files)
 
 
+@router.get("/validate", response_model=ValidationReport)
+def git_validate(session: AuthSession = Depends(require_auth)) -> ValidationReport:
+    _ = session
+    return ValidationReport(**validate_files(get_status()))
+
+
+@router.post("/sync", response_model=SyncResponse)
+def git_sync(session: AuthSession = Depends(require_auth)) -> SyncResponse:
+    result = sync_remote()
+    register_sync(session.user, result)
+    return SyncResponse(**result)
+
+
 @router.post("/publish", response_model=PublishResponse)
 def git_publish(payload: PublishRequest, session: AuthSession = Depends(require_auth)) -> PublishResponse:
-    files = [GitStatusItem(**item) for item in get_status()]
     try:
         result = publish(payload.message)
     except HTTPException as exc:
         _register_publish_run("error", None, None, str(exc.detail))
         raise
 
+    files = [GitStatusItem(**item) for item in result["files"]]
+
     _register_publish_run("success", result["commit_hash"], result["output"], None)
     _register_audit(
         session.user,
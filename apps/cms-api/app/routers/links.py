@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, status
+
+from ..dependencies import AuthSession, require_auth
+from ..schemas import DocumentLinkReport, DuplicateLinksReport, LinkCheckJobResponse, LinkCheckRequest, SiteLinkReport
+from ..services.link_checker import document_report, get_link_check_jobs, site_report, start_link_check
+from ..services.link_index import get_link_index
+
+router = APIRouter(prefix="/links", tags=["links"])
+
+
+@router.post("/check", response_model=LinkCheckJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def check_links(payload: LinkCheckRequest, session: AuthSession = Depends(require_auth)) -> LinkCheckJobResponse:
+    return LinkCheckJobResponse(**start_link_check(session.user, payload.item_id, force=payload.force))
+
+
+@router.get("/check/{job_id}", response_model=LinkCheckJobResponse)
+def get_link_check(job_id: str, session: AuthSession = Depends(require_auth)) -> LinkCheckJobResponse:
+    _ = session
+    return LinkCheckJobResponse(**get_link_check_jobs().get(job_id).snapshot())
+
+
+@router.get("/report", response_model=SiteLinkReport)
+def get_site_report(
+    session: AuthSession = Depends(require_auth),
+    include_ok: bool = Query(default=False),
+) -> SiteLinkReport:
+    _ = session
+    return SiteLinkReport(**site_report(include_ok))
+
+
+@router.get("/duplicates", response_model=DuplicateLinksReport)
+def get_duplicate_links(session: AuthSession = Depends(require_auth)) -> DuplicateLinksReport:
+    _ = session
+    return DuplicateLinksReport(clusters=get_link_index().clusters())
+
+
+@router.get("/report/{item_id:path}", response_model=DocumentLinkReport)
+def get_document_report(item_id: str, session: AuthSession = Depends(require_auth)) -> DocumentLinkReport:
+    _ = session
+    return DocumentLinkReport(**document_report(item_id))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from ..database import get_connection
+from ..dependencies import AuthSession, require_auth
+from ..schemas import MediaUploadResponse
+from ..services.media import store_upload
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+def _register_audit(user: str, action: str, target_path: str | None, details: dict[str, str]) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO audit_logs (ts, user, action, target_path, details_json)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (datetime.now(timezone.utc).isoformat(), user, action, target_path, json.dumps(details)),
+        )
+
+
+@router.post("", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    session: AuthSession = Depends(require_auth),
+    item_id: str | None = Query(default=None),
+    alt: str | None = Query(default=None),
+) -> MediaUploadResponse:
+    # The body is read here as a stream, so it must not be declared as a File/Form parameter.
+    stored = await store_upload(request, item_id, alt)
+    await run_in_threadpool(
+        _register_audit,
+        session.user,
+        "media.upload",
+        stored["path"],
+        {"hash": stored["hash"], "deduplicated": str(stored["deduplicated"]).lower()},
+    )
+    return MediaUploadResponse(**stored)
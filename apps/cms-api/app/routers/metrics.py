@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from ..compression import COMPRESSION_METRICS, COMPRESSION_RESOURCE, COMPRESSORS
+from ..dependencies import AuthSession, require_auth
+from ..schemas import CompressionMetricsResponse
+from ..sites import SITES
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/compression", response_model=CompressionMetricsResponse)
+def compression_metrics(session: AuthSession = Depends(require_auth)) -> CompressionMetricsResponse:
+    _ = session
+    return CompressionMetricsResponse(
+        **COMPRESSION_METRICS.snapshot(),
+        cache_bytes=sum(
+            cache.current_bytes
+            for cache in (state.peek(COMPRESSION_RESOURCE) for state in SITES.states.values())
+            if cache is not None
+        ),
+        encodings=list(COMPRESSORS),
+    )
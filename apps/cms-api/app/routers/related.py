@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+
+from ..dependencies import AuthSession, require_auth
+from ..schemas import RelatedExportResponse, RelatedQueryRequest, RelatedResponse
+from ..services.related import get_related_index
+
+router = APIRouter(prefix="/related", tags=["related"])
+
+
+@router.post("/query", response_model=RelatedResponse)
+def query_related(payload: RelatedQueryRequest, session: AuthSession = Depends(require_auth)) -> RelatedResponse:
+    _ = session
+    items = get_related_index().similar_to_text(payload.title, payload.categories, payload.body, payload.k)
+    return RelatedResponse(items=items)
+
+
+@router.post("/export", response_model=RelatedExportResponse)
+def export_related(
+    session: AuthSession = Depends(require_auth),
+    k: int = Query(default=3, ge=1, le=20),
+) -> RelatedExportResponse:
+    _ = session
+    return RelatedExportResponse(**get_related_index().export(k))
+
+
+@router.get("/{item_id:path}", response_model=RelatedResponse)
+def get_related(
+    item_id: str,
+    session: AuthSession = Depends(require_auth),
+    k: int = Query(default=5, ge=1, le=50),
+) -> RelatedResponse:
+    _ = session
+    return RelatedResponse(id=item_id, items=get_related_index().similar_to_document(item_id, k))
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from ..config import settings
+from ..dependencies import AuthSession, require_auth
+from ..schemas import SiteSummary
+from ..sites import SITES
+
+router = APIRouter(prefix="/sites", tags=["sites"])
+
+
+@router.get("", response_model=list[SiteSummary])
+def list_sites(session: AuthSession = Depends(require_auth)) -> list[SiteSummary]:
+    _ = session
+    return [
+        SiteSummary(
+            id=site_id,
+            default=site_id == settings.default_site_id,
+            active_caches=state.resource_names,
+            memory_bytes=state.memory_bytes(),
+            memory_budget_bytes=state.config.memory_budget_bytes,
+        )
+        for site_id, state in SITES.states.items()
+    ]
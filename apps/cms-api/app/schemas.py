@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 
 
 ContentType = Literal["note", "post"]
+DuplicatePolicy = Literal["warn", "reject", "ignore"]
 
 
 class LoginRequest(BaseModel):
@@ -21,6 +22,31 @@ class AuthMeResponse(BaseModel):
     user: str
 
 
+class SiteSummary(BaseModel):
+    id: str
+    default: bool
+    active_caches: list[str]
+    memory_bytes: int
+    memory_budget_bytes: int
+
+
+class CompressionEncodingStats(BaseModel):
+    responses: int
+    bytes_in: int
+    bytes_out: int
+
+
+class CompressionMetricsResponse(BaseModel):
+    responses: int
+    cache_hits: int
+    bytes_in: int
+    bytes_out: int
+    bytes_saved: int
+    by_encoding: dict[str, CompressionEncodingStats]
+    cache_bytes: int
+    encodings: list[str]
+
+
 class ContentItemSummary(BaseModel):
     id: str
     type: ContentType
@@ -39,6 +65,12 @@ class ContentListResponse(BaseModel):
     total: int
 
 
+class DuplicateLink(BaseModel):
+    url: str
+    normalized: str
+    documents: list[str]
+
+
 class ContentDocument(BaseModel):
     id: str
     type: ContentType
@@ -46,6 +78,66 @@ class ContentDocument(BaseModel):
     frontmatter: dict[str, Any]
     body: str
     raw: str
+    version: str | None = None
+    duplicate_links: list[DuplicateLink] | None = None
+
+
+class ContentRevision(BaseModel):
+    commit: str
+    author: str
+    date: str
+    subject: str
+
+
+class ContentHistoryResponse(BaseModel):
+    id: str
+    path: str
+    revisions: list[ContentRevision]
+
+
+class ContentRevisionDocument(BaseModel):
+    id: str
+    revision: str
+    blob: str
+    frontmatter: dict[str, Any]
+    body: str
+    raw: str
+
+
+class ContentDiffResponse(BaseModel):
+    id: str
+    base: str
+    target: str
+    diff: str
+
+
+class MediaUploadResponse(BaseModel):
+    hash: str
+    path: str
+    url: str
+    size: int
+    content_type: str
+    deduplicated: bool
+    markdown: str
+
+
+class TextDelta(BaseModel):
+    start: int = Field(ge=0)
+    end: int = Field(ge=0)
+    text: str = ""
+
+
+class AutosaveRequest(BaseModel):
+    base_version: str
+    deltas: list[TextDelta]
+
+
+class AutosaveResponse(BaseModel):
+    id: str
+    version: str
+    dirty: bool
+    conflict: bool = False
+    pending_patches: int
 
 
 class ContentCreateRequest(BaseModel):
@@ -57,6 +149,7 @@ class ContentCreateRequest(BaseModel):
     categories: list[str] = Field(default_factory=list)
     date: str | None = None
     draft: bool = True
+    duplicate_links: DuplicatePolicy = "warn"
 
 
 class ContentUpdateRequest(BaseModel):
@@ -67,6 +160,139 @@ class ContentUpdateRequest(BaseModel):
     categories: list[str] | None = None
     date: str | None = None
     draft: bool | None = None
+    duplicate_links: DuplicatePolicy = "warn"
+
+
+class BulkSelector(BaseModel):
+    type: ContentType | None = None
+    category: str | None = None
+    draft: bool | None = None
+    query: str = ""
+
+
+class FrontMatterTransform(BaseModel):
+    set_fields: dict[str, Any] = Field(default_factory=dict)
+    unset_fields: list[str] = Field(default_factory=list)
+    rename_categories: dict[str, str] = Field(default_factory=dict)
+    add_categories: list[str] = Field(default_factory=list)
+    remove_categories: list[str] = Field(default_factory=list)
+    normalize_date: bool = False
+
+
+class BulkRewriteRequest(BaseModel):
+    selector: BulkSelector = Field(default_factory=BulkSelector)
+    transform: FrontMatterTransform
+
+
+class BulkChange(BaseModel):
+    id: str
+    path: str
+    before: dict[str, Any]
+    after: dict[str, Any]
+
+
+class BulkError(BaseModel):
+    id: str
+    message: str
+
+
+class BulkPreviewResponse(BaseModel):
+    matched: int
+    changes: list[BulkChange]
+    errors: list[BulkError]
+
+
+class BulkJobResponse(BaseModel):
+    id: str
+    status: Literal["running", "done", "partial", "failed"]
+    total: int
+    processed: int
+    changed: int
+    conflicts: list[str]
+    errors: list[BulkError]
+    started_at: str
+    finished_at: str | None = None
+
+
+class RelatedItem(BaseModel):
+    id: str
+    title: str
+    url: str
+    score: float
+
+
+class RelatedResponse(BaseModel):
+    id: str | None = None
+    items: list[RelatedItem]
+
+
+class RelatedQueryRequest(BaseModel):
+    title: str = ""
+    categories: list[str] = Field(default_factory=list)
+    body: str = ""
+    k: int = Field(default=5, ge=1, le=50)
+
+
+class RelatedExportResponse(BaseModel):
+    path: str
+    documents: int
+    edges: int
+
+
+class DuplicateClusterMember(BaseModel):
+    id: str
+    url: str
+
+
+class DuplicateCluster(BaseModel):
+    normalized: str
+    documents: list[DuplicateClusterMember]
+
+
+class DuplicateLinksReport(BaseModel):
+    clusters: list[DuplicateCluster]
+
+
+class LinkCheckRequest(BaseModel):
+    item_id: str | None = None
+    force: bool = False
+
+
+class LinkCheckJobResponse(BaseModel):
+    id: str
+    status: Literal["running", "done", "failed"]
+    item_id: str | None = None
+    urls: int
+    due: int
+    checked: int
+    skipped: int
+    broken: int
+    started_at: str
+    finished_at: str | None = None
+
+
+class LinkStatus(BaseModel):
+    url: str
+    status: Literal["ok", "broken", "error", "unchecked"]
+    http_status: int | None = None
+    final_url: str | None = None
+    error: str | None = None
+    checked_at: str | None = None
+
+
+class SiteLinkStatus(LinkStatus):
+    documents: list[str]
+
+
+class DocumentLinkReport(BaseModel):
+    id: str
+    links: list[LinkStatus]
+
+
+class SiteLinkReport(BaseModel):
+    total: int
+    counts: dict[str, int]
+    links: list[SiteLinkStatus]
 
 
 class GitStatusItem(BaseModel):
@@ -79,6 +305,41 @@ class GitStatusResponse(BaseModel):
     files: list[GitStatusItem]
 
 
+class ValidationIssue(BaseModel):
+    code: str
+    message: str
+
+
+class ValidationFileReport(BaseModel):
+    path: str
+    ok: bool
+    errors: list[ValidationIssue]
+    warnings: list[ValidationIssue]
+
+
+class ValidationReport(BaseModel):
+    ok: bool
+    checked: int
+    cached: int
+    files: list[ValidationFileReport]
+
+
+class SyncChange(BaseModel):
+    status: str
+    path: str
+    id: str | None = None
+
+
+class SyncResponse(BaseModel):
+    status: Literal["up_to_date", "fast_forwarded", "ahead", "diverged"]
+    old: str | None = None
+    new: str | None = None
+    ahead: int
+    behind: int
+    changes: list[SyncChange]
+    conflicts: list[str] = Field(default_factory=list)
+
+
 class PublishRequest(BaseModel):
     message: str | None = None
 
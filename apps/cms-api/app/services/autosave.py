@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from ..config import SiteConfig, settings
+from ..database import get_connection
+from ..sites import SITES, current_site
+from .markdown import _build_document, _safe_resolve, content_version
+
+AUTOSAVE_RESOURCE = "autosave"
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkingCopy:
+    item_id: str
+    content_type: str
+    file_path: Path
+    raw: str
+    version: str
+    disk_mtime_ns: int
+    user: str = ""
+    dirty: bool = False
+    conflict: bool = False
+    pending_patches: int = 0
+    first_change: float = 0.0
+    last_change: float = 0.0
+
+
+def _is_low_surrogate(encoded: bytes, offset: int) -> bool:
+    """Whether the UTF-16 code unit at `offset` is the second half of a pair."""
+    if offset * 2 >= len(encoded):
+        return False
+    unit = int.from_bytes(encoded[offset * 2 : offset * 2 + 2], "little")
+    return 0xDC00 <= unit <= 0xDFFF
+
+
+def _apply_deltas(raw: str, deltas: list[dict[str, Any]]) -> str:
+    """Apply `{start, end, text}` replacements in order.
+
+    Offsets are UTF-16 code units, the unit JavaScript strings are indexed in,
+    so a client can send `selectionStart` and friends unchanged. An offset
+    that falls inside a surrogate pair is rejected.
+    """
+    encoded = raw.encode("utf-16-le")
+    for delta in deltas:
+        start, end = delta["start"], delta["end"]
+        if start > end or end * 2 > len(encoded):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Delta out of range")
+        if _is_low_surrogate(encoded, start) or _is_low_surrogate(encoded, end):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Delta splits a surrogate pair"
+            )
+        text = delta.get("text", "").encode("utf-16-le", "surrogatepass")
+        encoded = encoded[: start * 2] + text + encoded[end * 2 :]
+    try:
+        return encoded.decode("utf-16-le")
+    except UnicodeDecodeError:
+        # Only reachable when the inserted text itself carries a lone surrogate.
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Delta splits a surrogate pair")
+
+
+class AutosaveStore:
+    """In-memory working copies of documents being edited.
+
+    Patches are applied to the working copy only; the file is written once the
+    document has been quiet for the debounce interval (or has been dirty for
+    the maximum delay), on an explicit flush, and on shutdown. Each write
+    records a single audit entry covering all the patches it coalesced.
+
+    A dirty copy whose file changed on disk behind it (a pull, a bulk rewrite,
+    a manual edit) is marked as a conflict: it is never written over the file,
+    reads fall back to the file, and patches are refused with 409 until the
+    client rebases onto the current version or saves the whole document. `lock` is
+    reentrant so other writers can hold it around a flush and their own write.
+    """
+
+    def __init__(self, site: SiteConfig) -> None:
+        # Writes may happen from the flusher thread or while another site is
+        # being served, so the site's lock and database are bound here.
+        self.site = site
+        self._copies: dict[str, WorkingCopy] = {}
+        self.lock = threading.RLock()
+
+    def _load(self, item_id: str) -> WorkingCopy:
+        content_type, file_path = _safe_resolve(item_id)
+        if not file_path.exists():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+        raw = file_path.read_text(encoding="utf-8")
+        return WorkingCopy(
+            item_id=item_id,
+            content_type=content_type,
+            file_path=file_path,
+            raw=raw,
+            version=content_version(raw),
+            disk_mtime_ns=file_path.stat().st_mtime_ns,
+        )
+
+    @staticmethod
+    def _changed_on_disk(copy: WorkingCopy) -> bool:
+        try:
+            return copy.file_path.stat().st_mtime_ns != copy.disk_mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def _current(self, item_id: str) -> WorkingCopy:
+        copy = self._copies.get(item_id)
+        if copy is not None and self._changed_on_disk(copy):
+            if copy.dirty:
+                copy.conflict = True
+            else:
+                # A clean copy is only a read cache; reload it.
+                copy = None
+        if copy is None:
+            copy = self._load(item_id)
+            self._copies[item_id] = copy
+        return copy
+
+    def apply(self, item_id: str, base_version: str, deltas: list[dict[str, Any]], user: str) -> dict[str, Any]:
+        with self.lock:
+            copy = self._current(item_id)
+            if copy.conflict:
+                # The client may rebase onto the file on disk; anything else is refused.
+                disk = self._load(item_id)
+                if disk.version != base_version:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail={"message": "File changed on disk while editing", "version": disk.version, "conflict": True},
+                    )
+                copy = self._copies[item_id] = disk
+            if copy.version != base_version:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={"message": "Base version does not match", "version": copy.version},
+                )
+            copy.raw = _apply_deltas(copy.raw, deltas)
+            copy.version = content_version(copy.raw)
+            now = time.monotonic()
+            if not copy.dirty:
+                copy.first_change = now
+            copy.dirty = True
+            copy.pending_patches += 1
+            copy.last_change = now
+            copy.user = user
+            return self._summary(copy)
+
+    def document(self, item_id: str) -> dict[str, Any] | None:
+        """The unflushed working copy of a document, if there is one."""
+        with self.lock:
+            copy = self._copies.get(item_id)
+            if copy is None or not copy.dirty or copy.conflict:
+                return None
+            return _build_document(copy.item_id, copy.content_type, copy.file_path, copy.raw)
+
+    def _write(self, copy: WorkingCopy) -> bool:
+        """Write a dirty copy; returns False (and marks a conflict) if the file changed behind it."""
+        if copy.conflict:
+            return False
+        temp_path = copy.file_path.with_name(f".{copy.file_path.name}.autosave")
+        with SITES.get(self.site.id).content_lock:
+            if self._changed_on_disk(copy):
+                copy.conflict = True
+                logger.warning("Autosave of %s skipped: file changed on disk", copy.item_id)
+                return False
+            temp_path.write_text(copy.raw, encoding="utf-8")
+            with temp_path.open("rb") as handle:
+                os.fsync(handle.fileno())
+            os.replace(temp_path, copy.file_path)
+        copy.disk_mtime_ns = copy.file_path.stat().st_mtime_ns
+
+        with get_connection(self.site.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO audit_logs (ts, user, action, target_path, details_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    datetime.now(timezone.utc).isoformat(),
+                    copy.user,
+                    "content.autosave",
+                    str(copy.file_path),
+                    json.dumps({"id": copy.item_id, "patches": str(copy.pending_patches)}),
+                ),
+            )
+        copy.dirty = False
+        copy.pending_patches = 0
+        return True
+
+    def _refresh_indexes(self, written: list[tuple[str, str]]) -> None:
+        """Update the site's built indexes with `(item_id, raw)` pairs just written.
+
+        Called after `lock` is released: rebuilding an index can take a while
+        and must not hold up patches and reads of other documents.
+        """
+        if not written:
+            return
+        state = SITES.get(self.site.id)
+        item_ids = [item_id for item_id, _ in written]
+        for name in ("search_index", "related"):
+            index = state.peek(name)
+            if index is not None:
+                index.update_documents(item_ids)
+        link_index = state.peek("link_index")
+        if link_index is not None:
+            for item_id, raw in written:
+                link_index.update_document(item_id, raw)
+
+    def flush(self, item_id: str | None = None) -> list[dict[str, Any]]:
+        written: list[tuple[str, str]] = []
+        with self.lock:
+            if item_id is None:
+                copies = list(self._copies.values())
+            else:
+                copies = [self._copies[item_id]] if item_id in self._copies else []
+            for copy in copies:
+                if copy.dirty and self._write(copy):
+                    written.append((copy.item_id, copy.raw))
+            summaries = [self._summary(copy) for copy in copies]
+        self._refresh_indexes(written)
+        return summaries
+
+    def flush_due(self, debounce: float, max_delay: float, keep_clean: float) -> int:
+        """Write the copies that are due; returns how many were written."""
+        now = time.monotonic()
+        written: list[tuple[str, str]] = []
+        with self.lock:
+            for item_id, copy in list(self._copies.items()):
+                if copy.dirty and (now - copy.last_change >= debounce or now - copy.first_change >= max_delay):
+                    if self._write(copy):
+                        written.append((item_id, copy.raw))
+                elif not copy.dirty and now - copy.last_change >= keep_clean:
+                    del self._copies[item_id]
+        self._refresh_indexes(written)
+        return len(written)
+
+    def discard(self, item_id: str) -> bool:
+        """Forget a clean copy; dirty copies are kept and False is returned."""
+        with self.lock:
+            copy = self._copies.get(item_id)
+            if copy is not None and copy.dirty:
+                return False
+            self._copies.pop(item_id, None)
+            return True
+
+    def drop(self, item_id: str) -> None:
+        """Forget a copy even if it is dirty, when an explicit save or delete supersedes it."""
+        with self.lock:
+            self._copies.pop(item_id, None)
+
+    def is_dirty(self, item_id: str | None = None) -> bool:
+        with self.lock:
+            if item_id is not None:
+                copy = self._copies.get(item_id)
+                return copy is not None and copy.dirty
+            return any(copy.dirty for copy in self._copies.values())
+
+    def busy(self) -> bool:
+        return self.is_dirty()
+
+    def memory_bytes(self) -> int:
+        with self.lock:
+            return sum(len(copy.raw) for copy in self._copies.values())
+
+    def close(self) -> None:
+        self.flush()
+
+    @staticmethod
+    def _summary(copy: WorkingCopy) -> dict[str, Any]:
+        return {
+            "id": copy.item_id,
+            "version": copy.version,
+            "dirty": copy.dirty,
+            "conflict": copy.conflict,
+            "pending_patches": copy.pending_patches,
+        }
+
+
+def get_autosave_store() -> AutosaveStore:
+    return current_site().resource(AUTOSAVE_RESOURCE, AutosaveStore)
+
+
+class AutosaveFlusher:
+    """Background thread that writes due working copies of every site."""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _flush_sites(self, force: bool) -> None:
+        debounce = settings.autosave_debounce_seconds
+        for state in SITES.states.values():
+            store = state.peek(AUTOSAVE_RESOURCE)
+            if store is None:
+                continue
+            try:
+                if force:
+                    store.flush()
+                elif store.flush_due(debounce, settings.autosave_max_delay_seconds, keep_clean=debounce * 10):
+                    state.touch()
+            except Exception:  # noqa: BLE001
+                logger.exception("Autosave flush failed for site %s", state.config.id)
+
+    def _run(self) -> None:
+        interval = max(settings.autosave_debounce_seconds / 2, 0.1)
+        while not self._stop.wait(interval):
+            self._flush_sites(force=False)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cms-autosave", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_sites(force=True)
+
+
+AUTOSAVE_FLUSHER = AutosaveFlusher()
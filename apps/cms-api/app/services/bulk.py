@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from ..config import settings
+from ..database import get_connection
+from ..sites import SiteState, current_site
+from .autosave import AutosaveStore, get_autosave_store
+from .markdown import _serialize, _split_front_matter, _to_item_id
+from .related import RelatedIndex, get_related_index
+from .search_index import SearchIndex, get_search_index
+
+MAX_WRITE_ATTEMPTS = 3
+MAX_KEPT_JOBS = 20
+logger = logging.getLogger(__name__)
+
+
+class TransformError(ValueError):
+    pass
+
+
+def _normalize_date(value: Any) -> Any:
+    """ISO 8601 form of a front matter date; dates YAML already parsed are kept."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for pattern in ("%d/%m/%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(text, pattern).date().isoformat()
+        except ValueError:
+            pass
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError as exc:
+        raise TransformError(f"Unrecognized date '{text}'") from exc
+    return parsed.date().isoformat() if len(text) == 10 else parsed.isoformat()
+
+
+def _categories(frontmatter: dict[str, Any]) -> list[str]:
+    value = frontmatter.get("categories") or []
+    return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+
+
+def _matches(selector: dict[str, Any], frontmatter: dict[str, Any], file_path: Path) -> bool:
+    if selector.get("category") is not None and selector["category"] not in _categories(frontmatter):
+        return False
+    if selector.get("draft") is not None and bool(frontmatter.get("draft", False)) != selector["draft"]:
+        return False
+    query = (selector.get("query") or "").lower().strip()
+    title = str(frontmatter.get("title", file_path.stem))
+    return not query or query in title.lower() or query in file_path.stem.lower()
+
+
+def apply_transform(frontmatter: dict[str, Any], transform: dict[str, Any]) -> dict[str, Any]:
+    """Return a transformed copy of `frontmatter`; the input is left untouched."""
+    result = dict(frontmatter)
+    result.update(transform.get("set_fields") or {})
+    for key in transform.get("unset_fields") or []:
+        result.pop(key, None)
+
+    renames = transform.get("rename_categories") or {}
+    added = transform.get("add_categories") or []
+    removed = set(transform.get("remove_categories") or [])
+    if renames or added or removed:
+        categories: list[str] = []
+        for category in [*(renames.get(value, value) for value in _categories(result)), *added]:
+            if category not in removed and category not in categories:
+                categories.append(category)
+        result["categories"] = categories
+
+    if transform.get("normalize_date") and result.get("date") is not None:
+        result["date"] = _normalize_date(result["date"])
+    return result
+
+
+def _changed_fields(before: dict[str, Any], after: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    missing = object()
+    keys = [key for key in dict.fromkeys([*before, *after]) if before.get(key, missing) != after.get(key, missing)]
+    return (
+        {key: before[key] for key in keys if key in before},
+        {key: after[key] for key in keys if key in after},
+    )
+
+
+def _plan(raw: str, transform: dict[str, Any]) -> tuple[str, dict[str, Any], dict[str, Any]] | None:
+    """New file contents plus the changed fields, or None when nothing changes."""
+    frontmatter, body = _split_front_matter(raw)
+    transformed = apply_transform(frontmatter, transform)
+    before, after = _changed_fields(frontmatter, transformed)
+    if not before and not after:
+        return None
+    return _serialize(transformed, body), before, after
+
+
+def _candidates(site: SiteState, content_type: str | None) -> list[tuple[str, Path]]:
+    blog_root = site.config.blog_root
+    candidates: list[tuple[str, Path]] = []
+    for kind, section in (("note", "notes"), ("post", "posts")):
+        root = blog_root / "content" / section
+        if content_type not in {None, kind} or not root.exists():
+            continue
+        for file_path in sorted(root.rglob("*.md")):
+            if file_path.name != "_index.md":
+                candidates.append((_to_item_id(kind, root, file_path), file_path))
+    return candidates
+
+
+def _preview_one(item_id: str, file_path: Path, selector: dict[str, Any], transform: dict[str, Any]) -> dict[str, Any] | None:
+    try:
+        raw = file_path.read_text(encoding="utf-8")
+        frontmatter, _ = _split_front_matter(raw)
+        if not _matches(selector, frontmatter, file_path):
+            return None
+        planned = _plan(raw, transform)
+    except (HTTPException, TransformError, OSError) as exc:
+        return {"id": item_id, "error": _error_message(exc)}
+    if planned is None:
+        return {"id": item_id, "change": None}
+    _, before, after = planned
+    return {"id": item_id, "change": {"id": item_id, "path": str(file_path), "before": before, "after": after}}
+
+
+def _error_message(exc: Exception) -> str:
+    return str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+
+
+def preview(selector: dict[str, Any], transform: dict[str, Any]) -> dict[str, Any]:
+    """Dry run: which documents the selector matches and how their front matter would change."""
+    site = current_site()
+    candidates = _candidates(site, selector.get("type"))
+    with ThreadPoolExecutor(max_workers=settings.bulk_workers) as pool:
+        results = list(pool.map(lambda pair: _preview_one(*pair, selector, transform), candidates))
+
+    matched = [result for result in results if result is not None]
+    return {
+        "matched": len(matched),
+        "changes": [result["change"] for result in matched if result.get("change")],
+        "errors": [{"id": result["id"], "message": result["error"]} for result in matched if "error" in result],
+    }
+
+
+class BulkJob:
+    def __init__(self, user: str, selector: dict[str, Any], transform: dict[str, Any], targets: list[dict[str, Any]]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.user = user
+        self.selector = selector
+        self.transform = transform
+        self.targets = targets
+        self.status = "running"
+        self.processed = 0
+        self.changed: list[str] = []
+        self.conflicts: list[str] = []
+        self.errors: list[dict[str, str]] = []
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at: str | None = None
+        self._lock = threading.Lock()
+
+    def record(self, item_id: str, outcome: str, message: str = "") -> None:
+        with self._lock:
+            self.processed += 1
+            if outcome == "changed":
+                self.changed.append(item_id)
+            elif outcome == "conflict":
+                self.conflicts.append(item_id)
+            elif outcome == "error":
+                self.errors.append({"id": item_id, "message": message})
+
+    def finish(self, status_value: str) -> None:
+        with self._lock:
+            self.status = status_value
+            self.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "total": len(self.targets),
+                "processed": self.processed,
+                "changed": len(self.changed),
+                "conflicts": list(self.conflicts),
+                "errors": list(self.errors),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class BulkJobs:
+    """Recent bulk jobs of one site, kept in memory for progress polling."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, BulkJob] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: BulkJob) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            for job_id in list(self._jobs)[:-MAX_KEPT_JOBS]:
+                if self._jobs[job_id].status != "running":
+                    del self._jobs[job_id]
+
+    def busy(self) -> bool:
+        with self._lock:
+            return any(job.status == "running" for job in self._jobs.values())
+
+    def get(self, job_id: str) -> BulkJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bulk job not found")
+        return job
+
+
+def get_bulk_jobs() -> BulkJobs:
+    return current_site().resource("bulk_jobs", lambda site: BulkJobs())
+
+
+def _rewrite_one(site: SiteState, store: AutosaveStore, job: BulkJob, target: dict[str, Any]) -> None:
+    """Rewrite one file atomically, retrying if an editor saved it meanwhile.
+
+    A dirty working copy is flushed first so the rewrite plans from it; one
+    that cannot be flushed leaves the file untouched. The new content is
+    written and fsynced to a temp file without any site-wide lock, and only
+    the check that the file is unchanged plus the rename run under the
+    content lock, so workers do not serialize on each other. A patch landing
+    after the flush makes its working copy conflict with the renamed file,
+    like any other write behind an editor's back.
+    """
+    item_id, file_path = target["id"], Path(target["path"])
+    temp_path = file_path.with_name(f".{file_path.name}.bulk")
+    try:
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            if store.is_dirty(item_id):
+                store.flush(item_id)
+                if store.is_dirty(item_id):
+                    job.record(item_id, "error", "dirty working copy")
+                    return
+            raw = file_path.read_text(encoding="utf-8")
+            planned = _plan(raw, job.transform)
+            if planned is None:
+                job.record(item_id, "unchanged")
+                return
+            temp_path.write_text(planned[0], encoding="utf-8")
+            with temp_path.open("rb") as handle:
+                os.fsync(handle.fileno())
+            with site.content_lock:
+                if file_path.read_text(encoding="utf-8") != raw:
+                    continue
+                os.replace(temp_path, file_path)
+            store.discard(item_id)
+            job.record(item_id, "changed")
+            return
+        temp_path.unlink(missing_ok=True)
+        job.record(item_id, "conflict")
+    except (HTTPException, TransformError, OSError) as exc:
+        temp_path.unlink(missing_ok=True)
+        job.record(item_id, "error", _error_message(exc))
+
+
+def _run_job(site: SiteState, job: BulkJob, store: AutosaveStore, index: SearchIndex, related: RelatedIndex) -> None:
+    # The site counts as in use for the whole job, so its caches are not evicted under it.
+    with site.in_use():
+        try:
+            with ThreadPoolExecutor(max_workers=settings.bulk_workers) as pool:
+                list(pool.map(lambda target: _rewrite_one(site, store, job, target), job.targets))
+
+            # Indexes are refreshed once for the whole batch.
+            index.sync()
+            related.sync()
+
+            with get_connection(site.config.db_path) as conn:
+                conn.execute(
+                    """
+                    INSERT INTO audit_logs (ts, user, action, target_path, details_json)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (
+                        datetime.now(timezone.utc).isoformat(),
+                        job.user,
+                        "content.bulk_rewrite",
+                        None,
+                        json.dumps(
+                            {
+                                "job": job.id,
+                                "selector": json.dumps(job.selector, default=str),
+                                "transform": json.dumps(job.transform, default=str),
+                                "changed": str(len(job.changed)),
+                                "ids": json.dumps(job.changed),
+                            }
+                        ),
+                    ),
+                )
+            job.finish("done" if not job.errors and not job.conflicts else "partial")
+        except Exception:  # noqa: BLE001
+            logger.exception("Bulk job %s failed", job.id)
+            job.finish("failed")
+
+
+def start_bulk_rewrite(user: str, selector: dict[str, Any], transform: dict[str, Any]) -> dict[str, Any]:
+    """Start rewriting the documents matched by `selector` in a background job."""
+    report = preview(selector, transform)
+    if report["errors"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Some documents cannot be transformed", "errors": report["errors"]},
+        )
+
+    # Pending autosaves are written first so the rewrite starts from them.
+    store = get_autosave_store()
+    for change in report["changes"]:
+        store.flush(change["id"])
+
+    site = current_site()
+    job = BulkJob(user, selector, transform, report["changes"])
+    get_bulk_jobs().add(job)
+    threading.Thread(
+        target=_run_job,
+        args=(site, job, store, get_search_index(), get_related_index()),
+        name=f"cms-bulk-{job.id}",
+        daemon=True,
+    ).start()
+    return job.snapshot()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import difflib
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+from typing import IO, Any
+
+from fastapi import HTTPException, status
+
+from ..cache import BytesLRUCache
+from ..config import settings
+from ..sites import current_site
+from .git_ops import _run_git
+from .markdown import _safe_resolve, _split_front_matter
+
+REVISION_PATTERN = re.compile(r"^[0-9A-Za-z][0-9A-Za-z._~^/@{}-]*$")
+LOG_FIELD_SEPARATOR = "\x1f"
+HISTORY_MAX_COUNT = 200
+
+
+class CatFileProcess:
+    """Long-lived `git cat-file` process answering one object request per line.
+
+    `--batch-check` resolves names such as `<rev>:<path>` to object ids and
+    `--batch` returns contents; both read requests from stdin, so one process
+    serves every history request instead of forking `git` per revision.
+    """
+
+    def __init__(self, repo_root: Path, mode: str) -> None:
+        self.repo_root = repo_root
+        self.mode = mode
+        self._process: subprocess.Popen[bytes] | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> subprocess.Popen[bytes]:
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        try:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", self.mode],
+                cwd=self.repo_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+            )
+        except FileNotFoundError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Git is not installed in the API container",
+            ) from exc
+        return self._process
+
+    def request(self, name: str) -> tuple[str | None, str | None, bytes | None]:
+        """Return `(oid, type, contents)`; contents is only set in `--batch` mode."""
+        if "\n" in name:
+            # One request per line: a newline would desync every later reply.
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid object name")
+        with self._lock:
+            process = self._ensure_started()
+            stdin: IO[bytes] = process.stdin  # type: ignore[assignment]
+            stdout: IO[bytes] = process.stdout  # type: ignore[assignment]
+            try:
+                stdin.write(name.encode("utf-8") + b"\n")
+                stdin.flush()
+                header = stdout.readline().decode("utf-8").rstrip("\n")
+                if not header:
+                    raise BrokenPipeError("git cat-file exited")
+                # The name is echoed back and may contain spaces.
+                if header.endswith((" missing", " ambiguous")):
+                    return None, None, None
+                oid, object_type, size_text = header.split(" ")
+                size = int(size_text)
+                contents = None
+                if self.mode == "--batch":
+                    contents = stdout.read(size)
+                    if len(contents) != size or stdout.read(1) != b"\n":
+                        raise ValueError("Truncated git cat-file reply")
+                return oid, object_type, contents
+            except (BrokenPipeError, OSError, ValueError) as exc:
+                # Any protocol error leaves the stream in an unknown state; the
+                # next request starts a fresh process.
+                self._terminate()
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Git object reader failed",
+                ) from exc
+
+    def _terminate(self) -> None:
+        if self._process is None:
+            return
+        if self._process.stdin:
+            self._process.stdin.close()
+        try:
+            self._process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._terminate()
+
+
+class GitHistory:
+    """Object readers of one repository plus a cache of blob contents by object id."""
+
+    def __init__(self, repo_root: Path, cache_bytes: int) -> None:
+        self.repo_root = repo_root
+        self.blobs = BytesLRUCache(cache_bytes)
+        self._resolver = CatFileProcess(repo_root, "--batch-check")
+        self._reader = CatFileProcess(repo_root, "--batch")
+
+    def resolve_blob(self, revision: str, repo_path: str) -> str | None:
+        oid, object_type, _ = self._resolver.request(f"{revision}:{repo_path}")
+        if oid is None or object_type != "blob":
+            return None
+        return oid
+
+    def read_blob(self, oid: str) -> bytes:
+        cached = self.blobs.get(oid)
+        if cached is not None:
+            return cached
+        _, object_type, contents = self._reader.request(oid)
+        if contents is None or object_type != "blob":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Revision not found")
+        self.blobs.put(oid, contents)
+        return contents
+
+    def memory_bytes(self) -> int:
+        return self.blobs.memory_bytes()
+
+    def close(self) -> None:
+        self._resolver.close()
+        self._reader.close()
+
+
+def _history() -> GitHistory:
+    return current_site().resource("history", lambda site: GitHistory(site.blog_root, site.history_cache_bytes))
+
+
+def _validate_revision(revision: str) -> str:
+    if not REVISION_PATTERN.match(revision) or ".." in revision:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid revision")
+    return revision
+
+
+def _repo_path(item_id: str) -> str:
+    _, file_path = _safe_resolve(item_id)
+    return file_path.relative_to(settings.blog_root).as_posix()
+
+
+def _read_revision(item_id: str, revision: str) -> tuple[str, str]:
+    blob_oid = _history().resolve_blob(_validate_revision(revision), _repo_path(item_id))
+    if blob_oid is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found at revision")
+    return blob_oid, _history().read_blob(blob_oid).decode("utf-8", "replace")
+
+
+def list_revisions(item_id: str, limit: int) -> dict[str, Any]:
+    repo_path = _repo_path(item_id)
+    fields = LOG_FIELD_SEPARATOR.join(["%H", "%an", "%aI", "%s"])
+    command = _run_git(
+        ["log", f"--max-count={min(limit, HISTORY_MAX_COUNT)}", f"--format={fields}", "--", repo_path],
+        check=True,
+    )
+    revisions: list[dict[str, str]] = []
+    for line in command.stdout.splitlines():
+        parts = line.split(LOG_FIELD_SEPARATOR)
+        if len(parts) != 4:
+            continue
+        commit, author, date, subject = parts
+        revisions.append({"commit": commit, "author": author, "date": date, "subject": subject})
+
+    return {"id": item_id, "path": repo_path, "revisions": revisions}
+
+
+def get_revision(item_id: str, revision: str) -> dict[str, Any]:
+    blob_oid, raw = _read_revision(item_id, revision)
+    frontmatter, body = _split_front_matter(raw)
+    return {
+        "id": item_id,
+        "revision": revision,
+        "blob": blob_oid,
+        "frontmatter": frontmatter,
+        "body": body,
+        "raw": raw,
+    }
+
+
+def diff_revisions(item_id: str, base: str, target: str | None) -> dict[str, Any]:
+    _, base_raw = _read_revision(item_id, base)
+    if target is None:
+        _, file_path = _safe_resolve(item_id)
+        target_raw = file_path.read_text(encoding="utf-8") if file_path.exists() else ""
+        target_label = "working tree"
+    else:
+        _, target_raw = _read_revision(item_id, target)
+        target_label = target
+
+    repo_path = _repo_path(item_id)
+    diff = difflib.unified_diff(
+        base_raw.splitlines(),
+        target_raw.splitlines(),
+        fromfile=f"a/{repo_path} ({base})",
+        tofile=f"b/{repo_path} ({target_label})",
+        lineterm="",
+    )
+    return {"id": item_id, "base": base, "target": target_label, "diff": "\n".join(diff)}
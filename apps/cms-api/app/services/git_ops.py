@@ -2,14 +2,21 @@ from __future__ import annotations
 
 import os
 import subprocess
-import threading
+import tempfile
 from datetime import datetime, timezone
+from typing import Any
 
 from fastapi import HTTPException, status
 
 from ..config import settings
+from ..sites import SiteLock
+from .autosave import get_autosave_store
+from .markdown import CONTENT_LOCK
+from .search_index import get_search_index
+from .validation import validate_files
 
-GIT_LOCK = threading.Lock()
+GIT_LOCK = SiteLock("git_lock")
+PUBLISH_PATHS = ["content", "static/media", "static/search", "data/related.json"]
 
 
 def _run_git(args: list[str], check: bool = True, env: dict[str, str] | None = None) -> subprocess.CompletedProcess[str]:
@@ -62,8 +69,20 @@ def _git_auth_env() -> tuple[dict[str, str], str]:
     return env, remote_url
 
 
+def remote_target_and_env() -> tuple[str, dict[str, str] | None]:
+    """Remote to push to / fetch from: the PAT-authenticated URL if configured, else the named remote."""
+    if settings.git_token or settings.git_remote_url:
+        auth_env, remote_target = _git_auth_env()
+        return remote_target, auth_env
+    return settings.git_remote, None
+
+
+def _publish_paths() -> list[str]:
+    return [path for path in PUBLISH_PATHS if (settings.blog_root / path).exists()]
+
+
 def get_status() -> list[dict[str, str]]:
-    command = _run_git(["status", "--porcelain", "content"], check=True)
+    command = _run_git(["status", "--porcelain", "--", *_publish_paths()], check=True)
     lines = [line for line in command.stdout.splitlines() if line.strip()]
     files: list[dict[str, str]] = []
     for line in lines:
@@ -73,46 +92,115 @@ def get_status() -> list[dict[str, str]]:
     return files
 
 
-def publish(message: str | None) -> dict[str, str]:
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
-    commit_message = message or f"content: publish updates {timestamp}"
+def _snapshot_tree(index_file: str) -> tuple[str, str | None]:
+    """Stage the publishable paths into a private index and write its tree.
 
-    with GIT_LOCK:
-        files = get_status()
-        if not files:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No changes in content/ to publish",
-            )
+    Returns the tree id and the current HEAD commit (None on an empty repo).
+    The shared index is left alone, so editors and `git status` are not
+    affected while the snapshot is committed and pushed.
+    """
+    env = {"GIT_INDEX_FILE": index_file}
+    head_result = _run_git(["rev-parse", "--verify", "--quiet", "HEAD"], check=False)
+    parent = head_result.stdout.strip() or None
+    _run_git(["read-tree", parent] if parent else ["read-tree", "--empty"], check=True, env=env)
+    _run_git(["add", "--all", "--", *_publish_paths()], check=True, env=env)
+    tree = _run_git(["write-tree"], check=True, env=env).stdout.strip()
+    return tree, parent
 
-        _run_git(["add", "content/"], check=True)
 
-        commit_result = _run_git(["commit", "-m", commit_message], check=False)
-        if commit_result.returncode != 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=commit_result.stderr.strip() or "Commit failed",
-            )
+def _run_hook(name: str, *args: str, env: dict[str, str] | None = None) -> None:
+    """Run a repository hook, as `git commit` would; a failing hook aborts the publish."""
+    result = _run_git(["hook", "run", "--ignore-missing", name, "--", *args], check=False, env=env)
+    if result.returncode != 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(result.stderr or result.stdout).strip() or f"The {name} hook failed",
+        )
+
+
+def _commit_snapshot(tree: str, parent: str | None, message: str, workdir: str) -> tuple[str, str]:
+    """Commit `tree` on top of `parent`; returns the commit id and the final message.
+
+    `commit-tree` is plumbing: it neither runs hooks nor reads
+    `commit.gpgsign`. The `pre-commit` and `commit-msg` hooks are run here
+    against the snapshot index (so they see exactly what is committed, and
+    `commit-msg` may rewrite the message), and the commit is signed with `-S`
+    when the repository asks for signed commits.
+    """
+    env = {"GIT_INDEX_FILE": os.path.join(workdir, "index")}
+    message_file = os.path.join(workdir, "COMMIT_EDITMSG")
+    with open(message_file, "w", encoding="utf-8") as handle:
+        handle.write(message + "\n")
+    _run_hook("pre-commit", env=env)
+    _run_hook("commit-msg", message_file, env=env)
+    with open(message_file, encoding="utf-8") as handle:
+        message = handle.read().strip()
+    if not message:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The commit-msg hook left an empty message")
+
+    sign = _run_git(["config", "--bool", "commit.gpgsign"], check=False).stdout.strip() == "true"
+    parent_args = ["-p", parent] if parent else []
+    sign_args = ["-S"] if sign else []
+    commit_result = _run_git(["commit-tree", tree, *parent_args, *sign_args, "-F", message_file], check=False)
+    if commit_result.returncode != 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=commit_result.stderr.strip() or "Commit failed",
+        )
+    return commit_result.stdout.strip(), message
 
-        if settings.git_token or settings.git_remote_url:
-            auth_env, remote_target = _git_auth_env()
-            push_result = _run_git(["push", remote_target, settings.git_branch], check=False, env=auth_env)
-        else:
-            push_result = _run_git(["push", settings.git_remote, settings.git_branch], check=False)
+
+def publish(message: str | None) -> dict[str, Any]:
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+    commit_message = message or f"content: publish updates {timestamp}"
+
+    with GIT_LOCK, tempfile.TemporaryDirectory(prefix="cms-publish-") as workdir:
+        get_autosave_store().flush()
+
+        # Content writes only wait for the search artifact, validation and
+        # hashing the files into the snapshot index; committing and pushing
+        # happen outside CONTENT_LOCK, and whatever is written meanwhile stays
+        # out of this commit. The index is synced under the lock so the
+        # published artifact matches the published content.
+        with CONTENT_LOCK:
+            get_search_index().sync()
+            files = get_status()
+            if not files:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No changes in content/ to publish",
+                )
+
+            report = validate_files(files)
+            if not report["ok"]:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail={"message": "Content validation failed", "report": report},
+                )
+
+            tree, parent = _snapshot_tree(os.path.join(workdir, "index"))
+
+        commit_hash, commit_message = _commit_snapshot(tree, parent, commit_message, workdir)
+        _run_git(["update-ref", "-m", f"cms publish: {commit_message.splitlines()[0]}", "HEAD", commit_hash, parent or ""], check=True)
+        # Bring the shared index up to the new HEAD for the published paths;
+        # `reset` only touches index entries, never the files being edited.
+        _run_git(["reset", "--quiet", "--", *_publish_paths()], check=False)
+        # Like `git commit`, a failing post-commit hook does not undo the commit.
+        _run_git(["hook", "run", "--ignore-missing", "post-commit"], check=False)
+
+        remote_target, auth_env = remote_target_and_env()
+        push_result = _run_git(["push", remote_target, settings.git_branch], check=False, env=auth_env)
         if push_result.returncode != 0:
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail=push_result.stderr.strip() or "Push failed",
             )
 
-        head_result = _run_git(["rev-parse", "HEAD"], check=True)
-
-    output = "\n".join(
-        value for value in [commit_result.stdout.strip(), push_result.stdout.strip(), push_result.stderr.strip()] if value
-    )
+    output = "\n".join(value for value in [push_result.stdout.strip(), push_result.stderr.strip()] if value)
 
     return {
-        "commit_hash": head_result.stdout.strip(),
+        "commit_hash": commit_hash,
         "message": commit_message,
+        "files": files,
         "output": output,
     }
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from ..config import CURRENT_SITE_ID, settings
+from ..database import get_connection
+from ..sites import SITES, SiteState, current_site
+from .autosave import get_autosave_store
+from .git_ops import GIT_LOCK, _run_git, remote_target_and_env
+from .markdown import CONTENT_LOCK
+from .search_index import SECTIONS
+
+logger = logging.getLogger(__name__)
+SECTION_KINDS = {section: kind for kind, section in SECTIONS.items()}
+
+
+def _item_id(path: str) -> str | None:
+    """`content/notes/x.md` -> `note/x.md`; None for files outside the notes and posts."""
+    parts = path.split("/", 2)
+    if len(parts) != 3 or parts[0] != "content" or parts[1] not in SECTION_KINDS or not path.endswith(".md"):
+        return None
+    if parts[2].rsplit("/", 1)[-1] == "_index.md":
+        return None
+    return f"{SECTION_KINDS[parts[1]]}/{parts[2]}"
+
+
+def _rev_parse(revision: str) -> str | None:
+    result = _run_git(["rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}"], check=False)
+    return result.stdout.strip() or None
+
+
+def _is_ancestor(ancestor: str, descendant: str) -> bool:
+    return _run_git(["merge-base", "--is-ancestor", ancestor, descendant], check=False).returncode == 0
+
+
+def _changed_content(old: str | None, new: str) -> list[dict[str, Any]]:
+    # `-z` keeps paths verbatim; otherwise git quotes and escapes any path with
+    # non-ASCII characters (`"content/notes/caf\303\251.md"`).
+    if old is None:
+        result = _run_git(["ls-tree", "-r", "-z", "--name-only", new, "--", "content/"], check=True)
+        return [{"status": "A", "path": path, "id": _item_id(path)} for path in result.stdout.split("\0") if path]
+    result = _run_git(["diff", "-z", "--name-status", "--no-renames", f"{old}..{new}", "--", "content/"], check=True)
+    fields = result.stdout.split("\0")
+    # Fields alternate between a status and its path.
+    return [
+        {"status": state, "path": path, "id": _item_id(path)}
+        for state, path in zip(fields[0::2], fields[1::2])
+        if state and path
+    ]
+
+
+def _invalidate(site: SiteState, item_ids: list[str]) -> list[str]:
+    """Refresh only the pulled documents in the caches that are currently built.
+
+    Returns the pulled documents that still have unsaved autosave changes;
+    those working copies are kept (they now conflict with the file).
+    """
+    if not item_ids:
+        return []
+    conflicts: list[str] = []
+    store = site.peek("autosave")
+    if store is not None:
+        conflicts = [item_id for item_id in item_ids if not store.discard(item_id)]
+    for name in ("search_index", "related"):
+        resource = site.peek(name)
+        if resource is not None:
+            resource.update_documents(item_ids)
+    link_index = site.peek("link_index")
+    if link_index is not None:
+        for item_id in item_ids:
+            link_index.update_document(item_id)
+    return conflicts
+
+
+def sync_remote() -> dict[str, Any]:
+    """Fetch the configured branch and fast-forward to it, or report a divergence.
+
+    Runs under GIT_LOCK so it never interleaves with a publish. Pending
+    autosaves are written before the fetch and again right before the merge,
+    with the autosave lock held until the caches are refreshed so no patch
+    lands in between; CONTENT_LOCK is only held while the working tree is
+    fast-forwarded.
+    """
+    with GIT_LOCK:
+        store = get_autosave_store()
+        store.flush()
+        remote_target, auth_env = remote_target_and_env()
+        fetch_result = _run_git(["fetch", "--quiet", remote_target, settings.git_branch], check=False, env=auth_env)
+        if fetch_result.returncode != 0:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=fetch_result.stderr.strip() or "Fetch failed",
+            )
+
+        old = _rev_parse("HEAD")
+        new = _rev_parse("FETCH_HEAD")
+        result: dict[str, Any] = {
+            "status": "up_to_date",
+            "old": old,
+            "new": new,
+            "ahead": 0,
+            "behind": 0,
+            "changes": [],
+            "conflicts": [],
+        }
+        if new is None or old == new:
+            return result
+
+        if old is not None:
+            counts = _run_git(["rev-list", "--left-right", "--count", f"{old}...{new}"], check=True).stdout.split()
+            result["ahead"], result["behind"] = int(counts[0]), int(counts[1])
+            if _is_ancestor(new, old):
+                result["status"] = "ahead"
+                return result
+            if not _is_ancestor(old, new):
+                result["status"] = "diverged"
+                return result
+
+        with store.lock:
+            store.flush()
+            with CONTENT_LOCK:
+                merge_result = _run_git(["merge", "--ff-only", "--quiet", new], check=False)
+            if merge_result.returncode != 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=merge_result.stderr.strip() or "Fast-forward failed",
+                )
+
+            changes = _changed_content(old, new)
+            conflicts = _invalidate(current_site(), [change["id"] for change in changes if change["id"]])
+        result.update(status="fast_forwarded", changes=changes, conflicts=conflicts)
+        return result
+
+
+def register_sync(user: str, result: dict[str, Any]) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO audit_logs (ts, user, action, target_path, details_json)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                datetime.now(timezone.utc).isoformat(),
+                user,
+                "git.sync",
+                None,
+                json.dumps(
+                    {
+                        "status": result["status"],
+                        "old": result["old"] or "",
+                        "new": result["new"] or "",
+                        "changed": str(len(result["changes"])),
+                        "conflicts": json.dumps(result["conflicts"]),
+                    }
+                ),
+            ),
+        )
+
+
+class RemoteSyncer:
+    """Background thread that syncs every site with its remote at a fixed interval."""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sync_sites(self) -> None:
+        for site_id, state in SITES.states.items():
+            # This thread has its own context, so selecting the site here only affects it.
+            CURRENT_SITE_ID.set(site_id)
+            try:
+                # A sync that found nothing new does not count as use of the site.
+                with state.in_use(touch=False):
+                    result = sync_remote()
+                if result["status"] == "fast_forwarded":
+                    state.touch()
+                    register_sync("system", result)
+                if result["conflicts"]:
+                    logger.warning("Site %s pulled changes to documents with unsaved autosaves: %s", site_id, result["conflicts"])
+                if result["status"] == "diverged":
+                    logger.warning("Site %s diverged from its remote (%s ahead, %s behind)", site_id, result["ahead"], result["behind"])
+            except HTTPException as exc:
+                logger.warning("Remote sync failed for site %s: %s", site_id, exc.detail)
+            except Exception:  # noqa: BLE001
+                logger.exception("Remote sync failed for site %s", site_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.git_sync_interval_seconds):
+            self._sync_sites()
+
+    def start(self) -> None:
+        if settings.git_sync_interval_seconds > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cms-git-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+REMOTE_SYNCER = RemoteSyncer()
@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from ..config import CURRENT_SITE_ID, settings
+from ..database import get_connection
+from ..sites import SITES, SiteState, current_site
+from .markdown import _safe_resolve, _to_item_id
+
+# Parentheses are kept only when balanced (`.../Foo_(bar)`), so the one closing
+# a markdown link or a parenthetical is not part of the URL.
+URL_PATTERN = re.compile(r"https?://(?:[^\s<>\"'`\]()]|\([^\s<>\"'`\]()]*\))+", re.IGNORECASE)
+TRAILING_PUNCTUATION = ".,;:!?*_"
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+USER_AGENT = "llmdev-cms-linkcheck/1.0"
+LINK_CHECK_JOBS_RESOURCE = "link_check_jobs"
+MAX_KEPT_JOBS = 20
+logger = logging.getLogger(__name__)
+
+
+def extract_urls(text: str) -> list[str]:
+    """External URLs of a markdown document, in order of first appearance."""
+    seen: dict[str, None] = {}
+    for match in URL_PATTERN.findall(text):
+        url = match.rstrip(TRAILING_PUNCTUATION)
+        if urlsplit(url).hostname:
+            seen.setdefault(url, None)
+    return list(seen)
+
+
+def _corpus_urls() -> dict[str, list[str]]:
+    """Map of item id to the external URLs it contains."""
+    documents: dict[str, list[str]] = {}
+    for kind, root in (("note", settings.notes_dir), ("post", settings.posts_dir)):
+        if not root.exists():
+            continue
+        for file_path in sorted(root.rglob("*.md")):
+            if file_path.name == "_index.md":
+                continue
+            urls = extract_urls(file_path.read_text(encoding="utf-8"))
+            if urls:
+                documents[_to_item_id(kind, root, file_path)] = urls
+    return documents
+
+
+def _document_urls(item_id: str) -> list[str]:
+    _, file_path = _safe_resolve(item_id)
+    if not file_path.exists():
+        return []
+    return extract_urls(file_path.read_text(encoding="utf-8"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _load_results(urls: list[str]) -> dict[str, dict[str, Any]]:
+    if not urls:
+        return {}
+    results: dict[str, dict[str, Any]] = {}
+    with get_connection() as conn:
+        for start in range(0, len(urls), 500):
+            batch = urls[start : start + 500]
+            rows = conn.execute(
+                f"SELECT * FROM link_checks WHERE url IN ({','.join('?' for _ in batch)})",
+                batch,
+            ).fetchall()
+            results.update({row["url"]: dict(row) for row in rows})
+    return results
+
+
+def _store_results(results: list[dict[str, Any]]) -> None:
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO link_checks (url, status, http_status, final_url, error, checked_at, next_check_at)
+            VALUES (:url, :status, :http_status, :final_url, :error, :checked_at, :next_check_at)
+            ON CONFLICT(url) DO UPDATE SET
+                status = excluded.status,
+                http_status = excluded.http_status,
+                final_url = excluded.final_url,
+                error = excluded.error,
+                checked_at = excluded.checked_at,
+                next_check_at = excluded.next_check_at
+            """,
+            results,
+        )
+
+
+def _prune_results(keep: set[str]) -> None:
+    """Forget results of URLs that no document references anymore."""
+    with get_connection() as conn:
+        rows = conn.execute("SELECT url FROM link_checks").fetchall()
+        stale = [(row["url"],) for row in rows if row["url"] not in keep]
+        conn.executemany("DELETE FROM link_checks WHERE url = ?", stale)
+
+
+class LinkChecker:
+    """Probes URLs concurrently, with a global cap and a cap per host.
+
+    `transport` lets callers point the checker at a stand-in server (or an
+    `httpx.MockTransport`) instead of the network.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        per_host: int,
+        timeout: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.per_host = per_host
+        self.timeout = timeout
+        self.transport = transport
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        return self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+
+    async def _probe(self, client: httpx.AsyncClient, url: str) -> dict[str, Any]:
+        async with self._host_semaphore(url), self._global:
+            try:
+                response = await client.head(url)
+                if response.status_code in HEAD_FALLBACK_STATUSES:
+                    async with client.stream("GET", url) as streamed:
+                        response = streamed
+                status_value = "ok" if response.status_code < 400 else "broken"
+                return {
+                    "url": url,
+                    "status": status_value,
+                    "http_status": response.status_code,
+                    "final_url": str(response.url),
+                    "error": None,
+                }
+            except httpx.TimeoutException:
+                return {"url": url, "status": "error", "http_status": None, "final_url": None, "error": "timeout"}
+            except httpx.HTTPError as exc:
+                message = str(exc) or exc.__class__.__name__
+                return {"url": url, "status": "error", "http_status": None, "final_url": None, "error": message}
+
+    async def check(
+        self,
+        urls: list[str],
+        on_result: Callable[[dict[str, Any]], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Probe `urls`; `on_result` is called as each probe finishes, for progress."""
+
+        async def probe(client: httpx.AsyncClient, url: str) -> dict[str, Any]:
+            result = await self._probe(client, url)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        async with httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            transport=self.transport,
+        ) as client:
+            results = await asyncio.gather(*(probe(client, url) for url in urls))
+
+        now = _now()
+        for result in results:
+            ttl = settings.linkcheck_ttl_ok_hours if result["status"] == "ok" else settings.linkcheck_ttl_failed_hours
+            result["checked_at"] = now.isoformat()
+            result["next_check_at"] = (now + timedelta(hours=ttl)).isoformat()
+        return list(results)
+
+
+class LinkCheckJob:
+    def __init__(self, user: str, item_id: str | None, force: bool) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.user = user
+        self.item_id = item_id
+        self.force = force
+        self.status = "running"
+        self.urls = 0
+        self.due = 0
+        self.checked = 0
+        self.broken = 0
+        self.started_at = _now().isoformat()
+        self.finished_at: str | None = None
+        self._lock = threading.Lock()
+
+    def plan(self, urls: int, due: int) -> None:
+        with self._lock:
+            self.urls = urls
+            self.due = due
+
+    def record(self, result: dict[str, Any]) -> None:
+        with self._lock:
+            self.checked += 1
+            if result["status"] != "ok":
+                self.broken += 1
+
+    def finish(self, status_value: str) -> None:
+        with self._lock:
+            self.status = status_value
+            self.finished_at = _now().isoformat()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "item_id": self.item_id,
+                "urls": self.urls,
+                "due": self.due,
+                "checked": self.checked,
+                "skipped": self.urls - self.due,
+                "broken": self.broken,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class LinkCheckJobs:
+    """Recent link check jobs of one site, kept in memory for progress polling."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, LinkCheckJob] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: LinkCheckJob) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            for job_id in list(self._jobs)[:-MAX_KEPT_JOBS]:
+                if self._jobs[job_id].status != "running":
+                    del self._jobs[job_id]
+
+    def running(self, item_id: str | None) -> LinkCheckJob | None:
+        """The job already checking `item_id` (None: the whole site), if any."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "running" and job.item_id == item_id:
+                    return job
+        return None
+
+    def busy(self) -> bool:
+        with self._lock:
+            return any(job.status == "running" for job in self._jobs.values())
+
+    def get(self, job_id: str) -> LinkCheckJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Link check job not found")
+        return job
+
+
+def get_link_check_jobs() -> LinkCheckJobs:
+    return current_site().resource(LINK_CHECK_JOBS_RESOURCE, lambda site: LinkCheckJobs())
+
+
+async def run_link_checks(
+    item_id: str | None = None,
+    force: bool = False,
+    transport: httpx.AsyncBaseTransport | None = None,
+    job: LinkCheckJob | None = None,
+) -> dict[str, int]:
+    """Probe the stale links of one document or of the whole site and store the results.
+
+    Progress is reported to `job` when one is given.
+    """
+    if item_id is None:
+        documents = await run_in_threadpool(_corpus_urls)
+        urls = sorted({url for values in documents.values() for url in values})
+        await run_in_threadpool(_prune_results, set(urls))
+    else:
+        urls = await run_in_threadpool(_document_urls, item_id)
+
+    known = await run_in_threadpool(_load_results, urls)
+    now = _now().isoformat()
+    due = [url for url in urls if force or url not in known or known[url]["next_check_at"] <= now]
+
+    checker = LinkChecker(
+        settings.linkcheck_concurrency,
+        settings.linkcheck_per_host,
+        settings.linkcheck_timeout_seconds,
+        transport=transport,
+    )
+    if job is not None:
+        job.plan(len(urls), len(due))
+    results = await checker.check(due, on_result=job.record if job is not None else None) if due else []
+    if results:
+        await run_in_threadpool(_store_results, results)
+
+    return {
+        "urls": len(urls),
+        "checked": len(results),
+        "skipped": len(urls) - len(results),
+        "broken": sum(1 for result in results if result["status"] != "ok"),
+    }
+
+
+def _run_job(
+    site: SiteState,
+    job: LinkCheckJob,
+    transport: httpx.AsyncBaseTransport | None = None,
+    record_empty: bool = True,
+) -> None:
+    """Run a link check job to completion in the calling (non-request) thread.
+
+    The audit entry is skipped for a run that probed nothing unless `record_empty`.
+    """
+    # The thread has its own context, so selecting the site here only affects it.
+    CURRENT_SITE_ID.set(site.config.id)
+    try:
+        summary = asyncio.run(run_link_checks(job.item_id, job.force, transport=transport, job=job))
+        if summary["checked"] or record_empty:
+            _register_check(site, job, summary)
+        job.finish("done")
+    except Exception:  # noqa: BLE001
+        logger.exception("Link check job %s failed", job.id)
+        job.finish("failed")
+
+
+def _register_check(site: SiteState, job: LinkCheckJob, summary: dict[str, int]) -> None:
+    with get_connection(site.config.db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO audit_logs (ts, user, action, target_path, details_json)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                _now().isoformat(),
+                job.user,
+                "links.check",
+                job.item_id,
+                json.dumps({"job": job.id, **{key: str(value) for key, value in summary.items()}}),
+            ),
+        )
+
+
+def start_link_check(user: str, item_id: str | None = None, force: bool = False) -> dict[str, Any]:
+    """Check links in a background job; a running job for the same target is reused."""
+    if item_id is not None:
+        _safe_resolve(item_id)
+    jobs = get_link_check_jobs()
+    job = jobs.running(item_id)
+    if job is None:
+        job = LinkCheckJob(user, item_id, force)
+        jobs.add(job)
+        threading.Thread(
+            target=_run_job,
+            args=(current_site(), job),
+            name=f"cms-linkcheck-{job.id}",
+            daemon=True,
+        ).start()
+    return job.snapshot()
+
+
+def _link_entry(url: str, result: dict[str, Any] | None) -> dict[str, Any]:
+    if result is None:
+        return {"url": url, "status": "unchecked", "http_status": None, "final_url": None, "error": None, "checked_at": None}
+    return {
+        "url": url,
+        "status": result["status"],
+        "http_status": result["http_status"],
+        "final_url": result["final_url"],
+        "error": result["error"],
+        "checked_at": result["checked_at"],
+    }
+
+
+def document_report(item_id: str) -> dict[str, Any]:
+    urls = _document_urls(item_id)
+    known = _load_results(urls)
+    return {"id": item_id, "links": [_link_entry(url, known.get(url)) for url in urls]}
+
+
+def site_report(include_ok: bool = False) -> dict[str, Any]:
+    documents = _corpus_urls()
+    urls = sorted({url for values in documents.values() for url in values})
+    known = _load_results(urls)
+
+    counts = {"ok": 0, "broken": 0, "error": 0, "unchecked": 0}
+    for url in urls:
+        counts[known[url]["status"] if url in known else "unchecked"] += 1
+
+    referenced_by: dict[str, list[str]] = {}
+    for item_id, values in documents.items():
+        for url in values:
+            referenced_by.setdefault(url, []).append(item_id)
+
+    links: list[dict[str, Any]] = []
+    for url in urls:
+        entry = _link_entry(url, known.get(url))
+        if entry["status"] == "ok" and not include_ok:
+            continue
+        entry["documents"] = referenced_by[url]
+        links.append(entry)
+
+    return {"total": len(urls), "counts": counts, "links": links}
+
+
+class LinkRechecker:
+    """Background thread that re-probes the links whose results expired, on every site."""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _check_sites(self) -> None:
+        for state in SITES.states.values():
+            jobs = state.resource(LINK_CHECK_JOBS_RESOURCE, lambda site: LinkCheckJobs())
+            if jobs.running(None) is not None:
+                continue
+            job = LinkCheckJob("system", None, force=False)
+            jobs.add(job)
+            # Without `force`, only links past their TTL (or never checked) are probed.
+            _run_job(state, job, record_empty=False)
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.linkcheck_recheck_interval_seconds):
+            self._check_sites()
+
+    def start(self) -> None:
+        if settings.linkcheck_recheck_interval_seconds > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cms-linkcheck", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+LINK_RECHECKER = LinkRechecker()
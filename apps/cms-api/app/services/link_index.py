@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from fastapi import HTTPException, status
+
+from ..sites import current_site
+from .link_checker import extract_urls
+from .markdown import _compose_body, _to_item_id
+from .search_index import SECTIONS
+
+# Only keys that are never part of what a URL points to: generic names such as
+# `ref` or `si` select content on some sites (a git ref, a page section).
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "gbraid",
+    "wbraid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "twclid",
+    "ttclid",
+    "igshid",
+    "li_fat_id",
+    "mc_cid",
+    "mc_eid",
+    "mkt_tok",
+    "_hsenc",
+    "_hsmi",
+    "_gl",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Rough in-memory cost of one (document, link) pair across the three maps.
+ESTIMATED_LINK_BYTES = 300
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to compare links.
+
+    Scheme and host are lowercased, default ports, fragments, trailing slashes
+    and tracking parameters (`utm_*`, `fbclid`, ...) are dropped, and the
+    remaining query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+class LinkIndex:
+    """Normalized URL -> documents that contain it, kept current on every write.
+
+    The corpus is scanned once on first use; afterwards each write only
+    re-reads the document that changed, and duplicate lookups are a dict hit.
+    """
+
+    def __init__(self, blog_root: Path) -> None:
+        self.blog_root = blog_root
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._documents: dict[str, set[str]] = {}
+        self._links: dict[str, set[str]] = {}
+        self._originals: dict[str, dict[str, str]] = {}
+
+    def _file_path(self, item_id: str) -> Path | None:
+        kind, _, relative = item_id.partition("/")
+        if kind not in SECTIONS:
+            return None
+        return self.blog_root / "content" / SECTIONS[kind] / relative
+
+    def _set_document(self, item_id: str, text: str | None) -> None:
+        for normalized in self._links.pop(item_id, set()):
+            holders = self._documents.get(normalized)
+            if holders is not None:
+                holders.discard(item_id)
+                if not holders:
+                    del self._documents[normalized]
+        self._originals.pop(item_id, None)
+        if not text:
+            return
+
+        originals = {normalize_url(url): url for url in extract_urls(text)}
+        if not originals:
+            return
+        self._links[item_id] = set(originals)
+        self._originals[item_id] = originals
+        for normalized in originals:
+            self._documents.setdefault(normalized, set()).add(item_id)
+
+    def _load(self) -> None:
+        self._documents, self._links, self._originals = {}, {}, {}
+        for kind, section in SECTIONS.items():
+            root = self.blog_root / "content" / section
+            if not root.exists():
+                continue
+            for file_path in sorted(root.rglob("*.md")):
+                if file_path.name != "_index.md":
+                    self._set_document(_to_item_id(kind, root, file_path), file_path.read_text(encoding="utf-8"))
+        self._loaded = True
+
+    def sync(self) -> dict[str, int]:
+        """Rebuild from the content tree, after changes made outside the API."""
+        with self._lock:
+            self._load()
+            return {"documents": len(self._links), "links": len(self._documents)}
+
+    def update_document(self, item_id: str, text: str | None = None) -> None:
+        """Re-index one document; `text` defaults to the file contents (missing file = deleted)."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                return
+            if text is None:
+                file_path = self._file_path(item_id)
+                if file_path is not None and file_path.exists():
+                    text = file_path.read_text(encoding="utf-8")
+            self._set_document(item_id, text)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(len(links) for links in self._links.values()) * ESTIMATED_LINK_BYTES
+
+    def find_duplicates(self, urls: list[str], exclude: str | None = None) -> list[dict[str, Any]]:
+        """Documents other than `exclude` that already contain one of `urls`."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            duplicates: list[dict[str, Any]] = []
+            for url in dict.fromkeys(urls):
+                normalized = normalize_url(url)
+                documents = sorted(self._documents.get(normalized, set()) - {exclude})
+                if documents:
+                    duplicates.append({"url": url, "normalized": normalized, "documents": documents})
+            return duplicates
+
+    def clusters(self) -> list[dict[str, Any]]:
+        """Every normalized URL that appears in more than one document."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            clusters: list[dict[str, Any]] = []
+            for normalized, documents in sorted(self._documents.items()):
+                if len(documents) < 2:
+                    continue
+                members = sorted(documents)
+                clusters.append(
+                    {
+                        "normalized": normalized,
+                        "documents": [{"id": item_id, "url": self._originals[item_id][normalized]} for item_id in members],
+                    }
+                )
+            return clusters
+
+
+def get_link_index() -> LinkIndex:
+    return current_site().resource("link_index", lambda site: LinkIndex(site.blog_root))
+
+
+def _payload_text(payload: dict[str, Any]) -> str | None:
+    """The body a create/update payload will write, or None if it keeps the current one."""
+    if payload.get("body") is not None:
+        return payload["body"]
+    if payload.get("comment") is not None or payload.get("link") is not None:
+        return _compose_body(payload.get("comment"), payload.get("link"))
+    return None
+
+
+def check_duplicate_links(payload: dict[str, Any], exclude: str | None = None) -> list[dict[str, Any]]:
+    """Documents already holding the payload's links; raises 409 under the "reject" policy."""
+    policy = payload.get("duplicate_links", "warn")
+    text = _payload_text(payload)
+    if policy == "ignore" or not text:
+        return []
+    duplicates = get_link_index().find_duplicates(extract_urls(text), exclude=exclude)
+    if duplicates and policy == "reject":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Link already saved in another document", "duplicates": duplicates},
+        )
+    return duplicates
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import re
-import threading
 import unicodedata
 from collections import OrderedDict
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
 from typing import Any
 
@@ -12,8 +12,9 @@ import yaml
 from fastapi import HTTPException, status
 
 from ..config import settings
+from ..sites import SiteLock
 
-CONTENT_LOCK = threading.Lock()
+CONTENT_LOCK = SiteLock("content_lock")
 STANDARD_FIELDS = ["title", "date", "categories", "draft"]
 
 
@@ -67,7 +68,9 @@ def _ordered_front_matter(frontmatter: dict[str, Any]) -> OrderedDict[str, Any]:
 def _serialize(frontmatter: dict[str, Any], body: str) -> str:
     ordered = _ordered_front_matter(frontmatter)
     yaml_text = yaml.safe_dump(dict(ordered), sort_keys=False, allow_unicode=True).strip()
-    clean_body = body.rstrip()
+    # The split body keeps the blank line after the closing `---`; strip it so
+    # rewriting a file does not add one more each time.
+    clean_body = body.lstrip("\n").rstrip()
     if clean_body:
         return f"---\n{yaml_text}\n---\n\n{clean_body}\n"
     return f"---\n{yaml_text}\n---\n"
@@ -116,14 +119,12 @@ def _to_item_id(content_type: str, root: Path, file_path: Path) -> str:
     return f"{content_type}/{relative}"
 
 
-def get_content(item_id: str) -> dict[str, Any]:
-    content_type, file_path = _safe_resolve(item_id)
-    if not file_path.exists():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+def content_version(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
 
-    raw = file_path.read_text(encoding="utf-8")
-    frontmatter, body = _split_front_matter(raw)
 
+def _build_document(item_id: str, content_type: str, file_path: Path, raw: str) -> dict[str, Any]:
+    frontmatter, body = _split_front_matter(raw)
     return {
         "id": item_id,
         "type": content_type,
@@ -131,9 +132,40 @@ def get_content(item_id: str) -> dict[str, Any]:
         "frontmatter": frontmatter,
         "body": body,
         "raw": raw,
+        "version": content_version(raw),
     }
 
 
+def get_content(item_id: str) -> dict[str, Any]:
+    content_type, file_path = _safe_resolve(item_id)
+    if not file_path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+
+    raw = file_path.read_text(encoding="utf-8")
+    return _build_document(item_id, content_type, file_path, raw)
+
+
+def _summary_date(value: Any) -> str | None:
+    """Front matter `date` as the string the listing schema declares."""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _summary_draft(value: Any) -> bool | None:
+    """Front matter `draft` as a bool; YAML strings such as "yes" are accepted, anything else is None."""
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in {"true", "yes", "on", "1"}:
+        return True
+    if text in {"false", "no", "off", "0"}:
+        return False
+    return None
+
+
 def list_content(content_type: str | None, query: str, page: int, page_size: int) -> dict[str, Any]:
     candidates: list[tuple[str, Path, Path]] = []
 
@@ -164,8 +196,8 @@ def list_content(content_type: str | None, query: str, page: int, page_size: int
                     "path": str(file_path),
                     "slug": file_path.stem,
                     "title": title,
-                    "date": frontmatter.get("date"),
-                    "draft": frontmatter.get("draft"),
+                    "date": _summary_date(frontmatter.get("date")),
+                    "draft": _summary_draft(frontmatter.get("draft")),
                     "updated_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
                 }
             )
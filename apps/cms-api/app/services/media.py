@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any
+
+from fastapi import HTTPException, Request, status
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import get_connection
+from ..sites import current_site
+from .markdown import _safe_resolve
+
+MEDIA_URL_PREFIX = "/media"
+FILENAME_PATTERN = re.compile(r'filename="?([^";]*)"?')
+# The stored extension comes from the declared type, never from the client's
+# filename, so an upload cannot become an `.html` page on the site's origin.
+MEDIA_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+    "application/pdf": ".pdf",
+}
+SIGNATURE_BYTES = 16
+
+
+def _matches_signature(content_type: str, head: bytes) -> bool:
+    """Whether the first bytes of a file look like the declared type; unknown types pass."""
+    if content_type == "image/png":
+        return head.startswith(b"\x89PNG\r\n\x1a\n")
+    if content_type == "image/jpeg":
+        return head.startswith(b"\xff\xd8\xff")
+    if content_type == "image/gif":
+        return head.startswith((b"GIF87a", b"GIF89a"))
+    if content_type == "image/webp":
+        return head.startswith(b"RIFF") and head[8:12] == b"WEBP"
+    if content_type == "application/pdf":
+        return head.startswith(b"%PDF-")
+    return True
+
+
+class _UploadSink:
+    """Multipart callbacks that stream the first file part to a temporary file.
+
+    Only the current chunk is ever held in memory; the digest is updated as the
+    bytes are written, so the final content address is known once the part ends.
+    """
+
+    def __init__(self, target_dir: Path) -> None:
+        self.target_dir = target_dir
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self.temp_path: Path | None = None
+        self.finished = False
+        self._file: IO[bytes] | None = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[str, str] = {}
+
+    def callbacks(self) -> dict[str, Any]:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.decode("latin-1").lower()] = self._header_value.decode("utf-8", "replace")
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        match = FILENAME_PATTERN.search(self._headers.get("content-disposition", ""))
+        if match is None or self.temp_path is not None:
+            return
+        self.filename = Path(match.group(1)).name or "upload"
+        self.content_type = self._headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+        if self.content_type not in settings.upload_allowed_types:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported media type: {self.content_type}",
+            )
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        handle, temp_name = tempfile.mkstemp(prefix=".upload-", dir=self.target_dir)
+        self._file = os.fdopen(handle, "wb")
+        self.temp_path = Path(temp_name)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is None:
+            return
+        self.size += end - start
+        if self.size > settings.upload_max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload too large")
+        chunk = data[start:end]
+        if len(self.head) < SIGNATURE_BYTES:
+            self.head += chunk[: SIGNATURE_BYTES - len(self.head)]
+        self.digest.update(chunk)
+        self._file.write(chunk)
+
+    def _on_part_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.finished = True
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.temp_path is not None:
+            self.temp_path.unlink(missing_ok=True)
+
+
+def _extension(content_type: str) -> str:
+    return MEDIA_EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ".bin"
+
+
+def _destination(item_id: str | None) -> tuple[Path, str]:
+    """Directory for the upload and the URL prefix the markdown should use.
+
+    Page bundles (`.../index.md`) keep their resources next to the page, so the
+    link is relative; everything else goes to the shared `static/media` tree.
+    """
+    if item_id:
+        _, file_path = _safe_resolve(item_id)
+        if not file_path.exists():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+        if file_path.name == "index.md":
+            return file_path.parent, ""
+    return settings.blog_root / "static" / MEDIA_URL_PREFIX.strip("/"), MEDIA_URL_PREFIX
+
+
+def _lookup(digest: str, directory: Path) -> str | None:
+    with get_connection() as conn:
+        rows = conn.execute("SELECT path FROM media_files WHERE hash = ?", (digest,)).fetchall()
+    for row in rows:
+        stored = settings.blog_root / row["path"]
+        if stored.is_relative_to(directory) and stored.exists():
+            return row["path"]
+    return None
+
+
+def _register(digest: str, relative_path: str, size: int, content_type: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO media_files (hash, path, size, content_type, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (digest, relative_path, size, content_type, datetime.now(timezone.utc).isoformat()),
+        )
+
+
+def _commit_upload(sink: _UploadSink, directory: Path, url_prefix: str, alt: str | None) -> dict[str, Any]:
+    digest = sink.digest.hexdigest()
+    existing = _lookup(digest, directory)
+    if existing is not None:
+        sink.discard()
+        final_path = settings.blog_root / existing
+        deduplicated = True
+    else:
+        extension = _extension(sink.content_type or "")
+        if url_prefix:
+            final_path = directory / digest[:2] / f"{digest}{extension}"
+        else:
+            final_path = directory / f"{digest}{extension}"
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        deduplicated = final_path.exists()
+        if deduplicated:
+            sink.discard()
+        else:
+            os.replace(sink.temp_path, final_path)  # type: ignore[arg-type]
+            sink.temp_path = None
+        _register(digest, final_path.relative_to(settings.blog_root).as_posix(), sink.size, sink.content_type or "")
+
+    relative_to_dir = final_path.relative_to(directory).as_posix()
+    url = f"{url_prefix}/{relative_to_dir}" if url_prefix else relative_to_dir
+    label = (alt or Path(sink.filename or "").stem or digest[:12]).replace("]", "")
+    is_image = (sink.content_type or "").startswith("image/")
+    markdown = f"![{label}]({url})" if is_image else f"[{label}]({url})"
+
+    return {
+        "hash": digest,
+        "path": final_path.relative_to(settings.blog_root).as_posix(),
+        "url": url,
+        "size": sink.size,
+        "content_type": sink.content_type or "",
+        "deduplicated": deduplicated,
+        "markdown": markdown,
+    }
+
+
+async def store_upload(request: Request, item_id: str | None, alt: str | None) -> dict[str, Any]:
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected multipart/form-data body")
+
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > settings.upload_max_bytes + 64 * 1024:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload too large")
+
+    # Each site has its own upload slots, so a busy site cannot starve the others.
+    site = current_site()
+    semaphore = site.resource("uploads", lambda config: asyncio.Semaphore(settings.upload_max_concurrency))
+    if semaphore.locked():
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many concurrent uploads")
+
+    directory, url_prefix = _destination(item_id)
+    async with semaphore:
+        sink = _UploadSink(directory)
+        parser = MultipartParser(boundary, sink.callbacks())
+        try:
+            with site.in_use():
+                async for chunk in request.stream():
+                    if chunk:
+                        await run_in_threadpool(parser.write, chunk)
+                await run_in_threadpool(parser.finalize)
+                if not sink.finished:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file part in upload")
+                if not _matches_signature(sink.content_type or "", sink.head):
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail=f"File contents do not match {sink.content_type}",
+                    )
+                return await run_in_threadpool(_commit_upload, sink, directory, url_prefix, alt)
+        finally:
+            sink.discard()
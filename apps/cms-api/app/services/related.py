@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+from fastapi import HTTPException, status
+from scipy import sparse
+
+from ..config import settings
+from ..sites import current_site
+from .markdown import _safe_resolve, _split_front_matter, _to_item_id
+from .search_index import CATEGORY_WEIGHT, SECTIONS, TITLE_WEIGHT, tokenize
+
+EXPORT_PATH = Path("data") / "related.json"
+# Rough in-memory cost of a vocabulary entry and of a document's metadata.
+ESTIMATED_TERM_BYTES = 100
+ESTIMATED_DOCUMENT_BYTES = 300
+
+
+def _term_counts(title: str, categories: list[Any], body: str) -> Counter[str]:
+    counts: Counter[str] = Counter()
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    for token in tokenize(" ".join(str(value) for value in categories)):
+        counts[token] += CATEGORY_WEIGHT
+    counts.update(tokenize(body))
+    return counts
+
+
+def _parse(raw: str, file_path: Path) -> tuple[dict[str, Any], Counter[str]] | None:
+    """Metadata and term counts of a document, or None for drafts and broken files."""
+    try:
+        frontmatter, body = _split_front_matter(raw)
+    except Exception:  # noqa: BLE001
+        return None
+    if frontmatter.get("draft") is True:
+        return None
+    title = str(frontmatter.get("title", file_path.stem))
+    categories = frontmatter.get("categories") or []
+    categories = categories if isinstance(categories, list) else [categories]
+    slug = frontmatter.get("slug") or (file_path.parent.name if file_path.name == "index.md" else file_path.stem)
+    return {"title": title, "slug": str(slug)}, _term_counts(title, categories, body)
+
+
+class RelatedIndex:
+    """TF-IDF vectors of the published notes and posts, for "related content" queries.
+
+    Term counts are kept per document and only recomputed for documents that
+    changed (by mtime and size). Any change shifts the IDF of the terms it
+    touches, so a change only marks the matrix stale: the weighted,
+    L2-normalized CSR matrix is rebuilt from the rows with vectorized
+    operations on the next query, and a burst of autosaves costs one rebuild.
+    Queries are then a single sparse matrix-vector product.
+    """
+
+    def __init__(self, blog_root: Path) -> None:
+        self.blog_root = blog_root
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._stale = False
+        self._vocabulary: dict[str, int] = {}
+        self._rows: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._meta: dict[str, dict[str, Any]] = {}
+        self._stamps: dict[str, tuple[int, int]] = {}
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._matrix: sparse.csr_matrix | None = None
+        self._idf: np.ndarray = np.zeros(0)
+
+    def _files(self) -> dict[str, tuple[str, Path]]:
+        files: dict[str, tuple[str, Path]] = {}
+        for kind, section in SECTIONS.items():
+            root = self.blog_root / "content" / section
+            if not root.exists():
+                continue
+            for file_path in root.rglob("*.md"):
+                if file_path.name != "_index.md":
+                    files[_to_item_id(kind, root, file_path)] = (kind, file_path)
+        return files
+
+    def _encode(self, counts: Counter[str], grow: bool) -> tuple[np.ndarray, np.ndarray]:
+        columns: list[int] = []
+        values: list[float] = []
+        for token, count in counts.items():
+            column = self._vocabulary.get(token)
+            if column is None:
+                if not grow:
+                    continue
+                column = self._vocabulary[token] = len(self._vocabulary)
+            columns.append(column)
+            values.append(count)
+        # Sublinear term frequency, so a long body does not drown the title.
+        return np.asarray(columns, dtype=np.int32), 1.0 + np.log(np.asarray(values, dtype=np.float64))
+
+    def _set_document(self, item_id: str, kind: str | None, file_path: Path | None) -> bool:
+        """Refresh one document's row; returns True when the corpus changed."""
+        if file_path is None or not file_path.exists():
+            self._stamps.pop(item_id, None)
+            self._meta.pop(item_id, None)
+            return self._rows.pop(item_id, None) is not None
+
+        stat = file_path.stat()
+        self._stamps[item_id] = (stat.st_mtime_ns, stat.st_size)
+        parsed = _parse(file_path.read_text(encoding="utf-8"), file_path)
+        if parsed is None:
+            self._meta.pop(item_id, None)
+            return self._rows.pop(item_id, None) is not None
+
+        meta, counts = parsed
+        self._meta[item_id] = {"id": item_id, "title": meta["title"], "url": f"/{SECTIONS[kind]}/{meta['slug']}/"}
+        self._rows[item_id] = self._encode(counts, grow=True)
+        return True
+
+    def _compact_vocabulary(self) -> None:
+        """Drop the terms no document uses anymore and renumber the columns."""
+        arrays = [columns for columns, _ in self._rows.values()]
+        used = np.unique(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.int32)
+        if len(used) == len(self._vocabulary):
+            return
+        remap = np.full(len(self._vocabulary), -1, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        self._vocabulary = {token: int(remap[column]) for token, column in self._vocabulary.items() if remap[column] >= 0}
+        self._rows = {item_id: (remap[columns], values) for item_id, (columns, values) in self._rows.items()}
+
+    def _rebuild(self) -> None:
+        self._stale = False
+        self._compact_vocabulary()
+        self._ids = sorted(self._rows)
+        self._positions = {item_id: position for position, item_id in enumerate(self._ids)}
+        width = len(self._vocabulary)
+        if not self._ids:
+            self._matrix, self._idf = None, np.zeros(width)
+            return
+
+        rows = [self._rows[item_id] for item_id in self._ids]
+        lengths = np.fromiter((len(columns) for columns, _ in rows), dtype=np.int64, count=len(rows))
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.concatenate([columns for columns, _ in rows]) if indptr[-1] else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([values for _, values in rows]) if indptr[-1] else np.zeros(0)
+
+        document_frequency = np.bincount(indices, minlength=width)
+        self._idf = np.log((1 + len(self._ids)) / (1 + document_frequency)) + 1.0
+        data = data * self._idf[indices]
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(self._ids), width))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        self._matrix = sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+    def _ensure_built(self) -> None:
+        if not self._loaded:
+            self._sync()
+        if self._stale:
+            self._rebuild()
+
+    def _sync(self) -> int:
+        files = self._files()
+        changed = 0
+        for item_id in [value for value in self._stamps if value not in files]:
+            changed += int(self._set_document(item_id, None, None))
+        for item_id, (kind, file_path) in files.items():
+            stat = file_path.stat()
+            if self._stamps.get(item_id) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            changed += int(self._set_document(item_id, kind, file_path))
+        if changed or not self._loaded:
+            self._stale = True
+        self._loaded = True
+        return changed
+
+    def sync(self) -> dict[str, int]:
+        """Reconcile with the content tree; only files whose mtime or size changed are re-read."""
+        with self._lock:
+            changed = self._sync()
+            return {"documents": len(self._rows), "updated": changed, "terms": len(self._vocabulary)}
+
+    def update_document(self, item_id: str) -> None:
+        """Refresh one document after it was created, updated or deleted."""
+        self.update_documents([item_id])
+
+    def update_documents(self, item_ids: list[str]) -> None:
+        """Refresh several documents; the matrix is rebuilt on the next query."""
+        with self._lock:
+            if not self._loaded:
+                self._sync()
+                return
+            changed = False
+            for item_id in item_ids:
+                kind, _, relative = item_id.partition("/")
+                file_path = self.blog_root / "content" / SECTIONS.get(kind, "") / relative
+                if kind in SECTIONS and self._set_document(item_id, kind, file_path):
+                    changed = True
+            if changed:
+                self._stale = True
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            arrays = sum(columns.nbytes + values.nbytes for columns, values in self._rows.values())
+            if self._matrix is not None:
+                arrays += self._matrix.data.nbytes + self._matrix.indices.nbytes + self._matrix.indptr.nbytes
+            return (
+                arrays
+                + self._idf.nbytes
+                + len(self._vocabulary) * ESTIMATED_TERM_BYTES
+                + len(self._rows) * ESTIMATED_DOCUMENT_BYTES
+            )
+
+    def _top(self, scores: np.ndarray, k: int, exclude: int | None) -> list[dict[str, Any]]:
+        if exclude is not None:
+            scores[exclude] = -1.0
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            {**self._meta[self._ids[position]], "score": round(float(scores[position]), 4)}
+            for position in ordered
+            if scores[position] >= settings.related_min_score
+        ]
+
+    def _vector(self, counts: Counter[str]) -> sparse.csr_matrix | None:
+        columns, values = self._encode(counts, grow=False)
+        if not len(columns):
+            return None
+        values = values * self._idf[columns]
+        norm = float(np.sqrt(np.sum(values**2)))
+        zeros = np.zeros(len(columns), dtype=np.int32)
+        return sparse.csr_matrix((values / norm, (zeros, columns)), shape=(1, len(self._vocabulary)))
+
+    def similar_to_document(self, item_id: str, k: int) -> list[dict[str, Any]]:
+        with self._lock:
+            self._ensure_built()
+            position = self._positions.get(item_id)
+            if position is not None and self._matrix is not None:
+                scores = (self._matrix @ self._matrix[position].T).toarray().ravel()
+                return self._top(scores, k, exclude=position)
+
+        # Drafts are not part of the matrix; score them like any other text.
+        _, file_path = _safe_resolve(item_id)
+        if not file_path.exists():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
+        frontmatter, body = _split_front_matter(file_path.read_text(encoding="utf-8"))
+        categories = frontmatter.get("categories") or []
+        categories = categories if isinstance(categories, list) else [categories]
+        results = self.similar_to_text(str(frontmatter.get("title", "")), categories, body, k + 1)
+        return [result for result in results if result["id"] != item_id][:k]
+
+    def similar_to_text(self, title: str, categories: list[Any], body: str, k: int) -> list[dict[str, Any]]:
+        with self._lock:
+            self._ensure_built()
+            if self._matrix is None:
+                return []
+            vector = self._vector(_term_counts(title, categories, body))
+            if vector is None:
+                return []
+            scores = (self._matrix @ vector.T).toarray().ravel()
+            return self._top(scores, k, exclude=None)
+
+    def suggested_edges(self, k: int) -> dict[str, list[dict[str, Any]]]:
+        """Top-k neighbours of every document, from one sparse matrix product."""
+        with self._lock:
+            self._sync()
+            self._ensure_built()
+            if self._matrix is None:
+                return {}
+            similarity = (self._matrix @ self._matrix.T).tocsr()
+            similarity.setdiag(0)
+            similarity.eliminate_zeros()
+            edges: dict[str, list[dict[str, Any]]] = {}
+            for position, item_id in enumerate(self._ids):
+                start, end = similarity.indptr[position], similarity.indptr[position + 1]
+                scores = np.zeros(len(self._ids))
+                scores[similarity.indices[start:end]] = similarity.data[start:end]
+                edges[item_id] = self._top(scores, k, exclude=position)
+            return edges
+
+    def export(self, k: int) -> dict[str, Any]:
+        """Write `data/related.json` for the graph page: permalink -> related permalinks."""
+        edges = self.suggested_edges(k)
+        payload = {
+            self._meta[item_id]["url"]: [{"permalink": other["url"], "score": other["score"]} for other in related]
+            for item_id, related in sorted(edges.items())
+        }
+        target = self.blog_root / EXPORT_PATH
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.name}.tmp")
+        temp_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+        os.replace(temp_path, target)
+        return {
+            "path": EXPORT_PATH.as_posix(),
+            "documents": len(payload),
+            "edges": sum(len(values) for values in payload.values()),
+        }
+
+
+def get_related_index() -> RelatedIndex:
+    return current_site().resource("related", lambda site: RelatedIndex(site.blog_root))
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from ..sites import current_site
+from .markdown import _split_front_matter, _to_item_id
+
+INDEX_VERSION = 1
+SHARD_PREFIX_LENGTH = 2
+MIN_TOKEN_LENGTH = 2
+TITLE_WEIGHT = 5
+CATEGORY_WEIGHT = 3
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "as", "ao", "aos", "com", "como", "da", "das", "de", "do", "dos", "e", "em", "na", "nas", "no", "nos",
+    "o", "os", "ou", "para", "por", "que", "se", "um", "uma", "uns", "umas", "the", "and", "of", "to", "in",
+    "is", "it", "for", "on", "with", "https", "http", "www", "br",
+}
+SECTIONS = {"note": "notes", "post": "posts"}
+# Rough in-memory cost of one (document, token) pair, kept in both `_terms` and
+# `_postings`, and of one document entry; used for the site memory budget.
+ESTIMATED_POSTING_BYTES = 160
+ESTIMATED_DOCUMENT_BYTES = 400
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, so `Configuração` and `configuracao` match."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(fold(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def _shard_key(token: str) -> str:
+    return token[:SHARD_PREFIX_LENGTH]
+
+
+def _atomic_write(path: Path, payload: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_bytes(orjson.dumps(payload))
+    os.replace(temp_path, path)
+
+
+class SearchIndex:
+    """Inverted index over published notes and posts, written as prefix shards.
+
+    `static/search/manifest.json` lists the documents (a document number is its
+    position in the list) and the available shards; `static/search/<xx>.json`
+    maps every token starting with `xx` to `[[doc, score], ...]`. The site only
+    downloads the manifest plus the shard of the typed prefix.
+
+    The in-memory state is restored from the artifact itself, and each change
+    only rewrites the shards whose tokens were touched.
+    """
+
+    def __init__(self, blog_root: Path) -> None:
+        self.blog_root = blog_root
+        self.output_dir = blog_root / "static" / "search"
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._docs: list[dict[str, Any] | None] = []
+        self._numbers: dict[str, int] = {}
+        self._terms: dict[int, dict[str, int]] = {}
+        self._postings: dict[str, dict[str, dict[int, int]]] = {}
+
+    def _load(self) -> bool:
+        """Restore the state from the artifact; returns False when there is no usable one."""
+        restored = False
+        manifest_path = self.output_dir / "manifest.json"
+        if manifest_path.exists():
+            try:
+                manifest = orjson.loads(manifest_path.read_bytes())
+                if manifest.get("version") == INDEX_VERSION:
+                    self._docs = manifest["docs"]
+                    for shard in manifest["shards"]:
+                        shard_path = self.output_dir / f"{shard}.json"
+                        entries = orjson.loads(shard_path.read_bytes()) if shard_path.exists() else {}
+                        postings = self._postings.setdefault(shard, {})
+                        for token, pairs in entries.items():
+                            postings[token] = {number: score for number, score in pairs}
+                            for number, score in pairs:
+                                self._terms.setdefault(number, {})[token] = score
+                    restored = True
+            except (OSError, ValueError, KeyError, TypeError):
+                self._docs, self._terms, self._postings = [], {}, {}
+        self._numbers = {doc["id"]: number for number, doc in enumerate(self._docs) if doc is not None}
+        self._loaded = True
+        return restored
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            pairs = sum(len(terms) for terms in self._terms.values())
+            return pairs * ESTIMATED_POSTING_BYTES + len(self._docs) * ESTIMATED_DOCUMENT_BYTES
+
+    def _document_entry(self, kind: str, root: Path, file_path: Path) -> tuple[dict[str, Any], dict[str, int]] | None:
+        # The hash covers the bytes on disk, as in `sync()`; parsing uses the
+        # newline-translated text that `read_text()` would give.
+        payload = file_path.read_bytes()
+        raw = payload.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        try:
+            frontmatter, body = _split_front_matter(raw)
+        except Exception:  # noqa: BLE001
+            return None
+        if frontmatter.get("draft") is True:
+            return None
+
+        title = str(frontmatter.get("title", file_path.stem))
+        categories = frontmatter.get("categories") or []
+        categories = categories if isinstance(categories, list) else [categories]
+        slug = frontmatter.get("slug") or (file_path.parent.name if file_path.name == "index.md" else file_path.stem)
+
+        scores: Counter[str] = Counter()
+        for token in tokenize(title):
+            scores[token] += TITLE_WEIGHT
+        for token in tokenize(" ".join(str(value) for value in categories)):
+            scores[token] += CATEGORY_WEIGHT
+        scores.update(tokenize(body))
+
+        date_value = frontmatter.get("date")
+        entry = {
+            "id": _to_item_id(kind, root, file_path),
+            "url": f"/{SECTIONS[kind]}/{slug}/",
+            "title": title,
+            "type": kind,
+            "date": str(date_value) if date_value is not None else None,
+            "hash": hashlib.sha1(payload).hexdigest(),
+        }
+        return entry, dict(scores)
+
+    def _set_document(self, item_id: str, entry: dict[str, Any] | None, terms: dict[str, int]) -> set[str]:
+        """Replace one document's postings and return the shard keys that changed."""
+        touched: set[str] = set()
+        number = self._numbers.get(item_id)
+        if number is not None:
+            for token in self._terms.pop(number, {}):
+                shard = _shard_key(token)
+                postings = self._postings.get(shard, {})
+                postings.get(token, {}).pop(number, None)
+                if token in postings and not postings[token]:
+                    del postings[token]
+                touched.add(shard)
+            if entry is None:
+                self._docs[number] = None
+                del self._numbers[item_id]
+                return touched
+        if entry is None:
+            return touched
+
+        if number is None:
+            number = next((index for index, doc in enumerate(self._docs) if doc is None), len(self._docs))
+            if number == len(self._docs):
+                self._docs.append(None)
+            self._numbers[item_id] = number
+        self._docs[number] = entry
+        self._terms[number] = terms
+        for token, score in terms.items():
+            shard = _shard_key(token)
+            self._postings.setdefault(shard, {}).setdefault(token, {})[number] = score
+            touched.add(shard)
+        return touched
+
+    def _write(self, touched: set[str]) -> None:
+        for shard in touched:
+            postings = self._postings.get(shard, {})
+            shard_path = self.output_dir / f"{shard}.json"
+            if not postings:
+                self._postings.pop(shard, None)
+                shard_path.unlink(missing_ok=True)
+                continue
+            _atomic_write(
+                shard_path,
+                {
+                    token: sorted(pairs.items(), key=lambda pair: -pair[1])
+                    for token, pairs in sorted(postings.items())
+                },
+            )
+        _atomic_write(
+            self.output_dir / "manifest.json",
+            {
+                "version": INDEX_VERSION,
+                "shard_prefix_length": SHARD_PREFIX_LENGTH,
+                "docs": self._docs,
+                "shards": sorted(self._postings),
+            },
+        )
+
+    def _entry_for_id(self, item_id: str) -> tuple[dict[str, Any] | None, dict[str, int]]:
+        kind, _, relative = item_id.partition("/")
+        root = self.blog_root / "content" / SECTIONS.get(kind, "")
+        file_path = root / relative
+        if kind not in SECTIONS or not file_path.exists():
+            return None, {}
+        result = self._document_entry(kind, root, file_path)
+        return result if result is not None else (None, {})
+
+    def update_document(self, item_id: str) -> None:
+        """Re-index one document after it was created, updated or deleted."""
+        self.update_documents([item_id])
+
+    def update_documents(self, item_ids: list[str]) -> None:
+        """Re-index several documents, writing the touched shards once."""
+        with self._lock:
+            if not self._loaded and not self._load():
+                # Without an artifact, indexing only these documents would
+                # publish a partial index; build it from the whole tree instead.
+                self._sync()
+                return
+            touched: set[str] = set()
+            changed = False
+            for item_id in item_ids:
+                entry, terms = self._entry_for_id(item_id)
+                changed = changed or item_id in self._numbers or entry is not None
+                touched |= self._set_document(item_id, entry, terms)
+            if changed:
+                self._write(touched)
+
+    def sync(self) -> dict[str, int]:
+        """Reconcile the artifact with the content tree; only changed files are re-indexed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return self._sync()
+
+    def _sync(self) -> dict[str, int]:
+        touched: set[str] = set()
+        seen: set[str] = set()
+        updated = 0
+        for kind, section in SECTIONS.items():
+            root = self.blog_root / "content" / section
+            if not root.exists():
+                continue
+            for file_path in sorted(root.rglob("*.md")):
+                if file_path.name == "_index.md":
+                    continue
+                item_id = _to_item_id(kind, root, file_path)
+                seen.add(item_id)
+                number = self._numbers.get(item_id)
+                current = self._docs[number] if number is not None else None
+                raw_hash = hashlib.sha1(file_path.read_bytes()).hexdigest()
+                if current is not None and current["hash"] == raw_hash:
+                    continue
+                result = self._document_entry(kind, root, file_path)
+                if result is None and number is None:
+                    continue
+                entry, terms = result if result is not None else (None, {})
+                touched |= self._set_document(item_id, entry, terms)
+                updated += 1
+        for item_id in [value for value in self._numbers if value not in seen]:
+            touched |= self._set_document(item_id, None, {})
+            updated += 1
+        if updated or not (self.output_dir / "manifest.json").exists():
+            self._write(touched)
+        return {"documents": len(self._numbers), "updated": updated, "shards_written": len(touched)}
+
+
+def get_search_index() -> SearchIndex:
+    return current_site().resource("search_index", lambda site: SearchIndex(site.blog_root))
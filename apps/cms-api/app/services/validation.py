@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import yaml
+from fastapi import HTTPException
+
+from ..config import settings
+from ..sites import current_site
+from .markdown import _split_front_matter
+
+REQUIRED_FIELDS: dict[str, tuple[type, ...]] = {
+    "title": (str,),
+    "date": (str, date),
+}
+# Section `_index.md` files describe a list page and normally carry no date.
+SECTION_INDEX_REQUIRED_FIELDS = ("title",)
+OPTIONAL_FIELDS: dict[str, tuple[type, ...]] = {
+    "categories": (list,),
+    "tags": (list,),
+    "draft": (bool,),
+    "slug": (str,),
+}
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$")
+MARKDOWN_LINK_PATTERN = re.compile(r"\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+REF_SHORTCODE_PATTERN = re.compile(r"\{\{<\s*(?:rel)?ref\s+\"([^\"]+)\"\s*>\}\}")
+TAXONOMIES = {"tags", "categories"}
+
+
+@dataclass
+class FileAnalysis:
+    """Checks that depend only on the file contents, cached by content hash."""
+
+    errors: list[dict[str, str]] = field(default_factory=list)
+    warnings: list[dict[str, str]] = field(default_factory=list)
+    slug: str | None = None
+    links: list[str] = field(default_factory=list)
+
+
+ANALYSIS_CACHE_MAX_ENTRIES = 4096
+# Rough size of one cached analysis (dataclass, issue dicts, link strings).
+ESTIMATED_ANALYSIS_BYTES = 1024
+
+
+class AnalysisCache:
+    def __init__(self) -> None:
+        self.entries: dict[str, FileAnalysis] = {}
+        self.lock = threading.Lock()
+
+    def memory_bytes(self) -> int:
+        with self.lock:
+            return len(self.entries) * ESTIMATED_ANALYSIS_BYTES
+
+
+def _analysis_cache() -> AnalysisCache:
+    return current_site().resource("validation", lambda site: AnalysisCache())
+
+
+def _issue(code: str, message: str) -> dict[str, str]:
+    return {"code": code, "message": message}
+
+
+def _analyze(raw: str, stem: str) -> FileAnalysis:
+    analysis = FileAnalysis()
+    try:
+        frontmatter, body = _split_front_matter(raw)
+    except (yaml.YAMLError, HTTPException) as exc:
+        message = getattr(exc, "detail", None) or str(exc).splitlines()[0]
+        analysis.errors.append(_issue("frontmatter.invalid", message))
+        return analysis
+
+    if not raw.startswith("---\n") or (not frontmatter and body == raw):
+        analysis.errors.append(_issue("frontmatter.missing", "Front matter block not found"))
+        return analysis
+
+    required = {name: REQUIRED_FIELDS[name] for name in SECTION_INDEX_REQUIRED_FIELDS} if stem == "_index" else REQUIRED_FIELDS
+    for name, types in required.items():
+        if name not in frontmatter or frontmatter[name] in (None, ""):
+            analysis.errors.append(_issue("field.missing", f"Required field '{name}' is missing"))
+        elif not isinstance(frontmatter[name], types):
+            analysis.errors.append(_issue("field.type", f"Field '{name}' has an invalid type"))
+    for name, types in OPTIONAL_FIELDS.items():
+        if frontmatter.get(name) is not None and not isinstance(frontmatter[name], types):
+            analysis.errors.append(_issue("field.type", f"Field '{name}' has an invalid type"))
+    for name in ("categories", "tags"):
+        values = frontmatter.get(name)
+        if isinstance(values, list) and not all(isinstance(value, str) for value in values):
+            analysis.errors.append(_issue("field.type", f"Field '{name}' must be a list of strings"))
+
+    date_value = frontmatter.get("date")
+    if isinstance(date_value, str) and date_value and not DATE_PATTERN.match(date_value.strip()):
+        analysis.errors.append(_issue("date.format", f"Date '{date_value}' is not ISO 8601 (YYYY-MM-DD)"))
+    elif isinstance(date_value, str) and date_value:
+        try:
+            datetime.fromisoformat(date_value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            analysis.errors.append(_issue("date.format", f"Date '{date_value}' is not a valid date"))
+
+    if frontmatter.get("draft") is True:
+        analysis.warnings.append(_issue("draft", "Document is marked as draft and will not be rendered"))
+
+    slug = frontmatter.get("slug")
+    analysis.slug = slug.strip() if isinstance(slug, str) and slug.strip() else stem
+    analysis.links = MARKDOWN_LINK_PATTERN.findall(body) + REF_SHORTCODE_PATTERN.findall(body)
+    return analysis
+
+
+def _cached_analysis(cache: AnalysisCache, raw: str, stem: str) -> tuple[FileAnalysis, bool]:
+    digest = hashlib.sha256(f"{stem}\0{raw}".encode("utf-8")).hexdigest()
+    with cache.lock:
+        cached = cache.entries.get(digest)
+    if cached is not None:
+        return cached, True
+
+    analysis = _analyze(raw, stem)
+    with cache.lock:
+        if len(cache.entries) >= ANALYSIS_CACHE_MAX_ENTRIES:
+            cache.entries.clear()
+        cache.entries[digest] = analysis
+    return analysis, False
+
+
+def _page_stem(file_path: Path) -> str:
+    return file_path.parent.name if file_path.name == "index.md" else file_path.stem
+
+
+def _content_files(root: Path) -> list[Path]:
+    content_root = root / "content"
+    if not content_root.exists():
+        return []
+    return sorted(content_root.rglob("*.md"))
+
+
+def _load(cache: AnalysisCache, file_path: Path) -> tuple[Path, FileAnalysis, bool]:
+    raw = file_path.read_text(encoding="utf-8")
+    analysis, cached = _cached_analysis(cache, raw, _page_stem(file_path))
+    return file_path, analysis, cached
+
+
+def _link_targets(files: list[Path], root: Path) -> set[str]:
+    """Site paths that resolve to a content page, e.g. `/notes/fast-resume/`."""
+    targets: set[str] = set()
+    content_root = root / "content"
+    for file_path in files:
+        relative = file_path.relative_to(content_root)
+        if file_path.name in {"index.md", "_index.md"}:
+            page = relative.parent.as_posix()
+        else:
+            page = relative.with_suffix("").as_posix()
+        page = "" if page == "." else page
+        targets.add(f"/{page}/" if page else "/")
+        targets.add(relative.as_posix())
+        targets.add(relative.name)
+    return targets
+
+
+def _internal_target(link: str) -> str | None:
+    """Normalize an internal link to a key of `_link_targets`, or None if external."""
+    if link.startswith(("#", "mailto:", "tel:")) or "://" in link:
+        return None
+    target = link.split("#", 1)[0].split("?", 1)[0]
+    if target.endswith(".md"):
+        parts = [part for part in target.split("/") if part not in {"", ".", ".."}]
+        return "/".join(parts).removeprefix("content/")
+    if not target.startswith("/"):
+        return None
+    return target if target.endswith("/") else f"{target}/"
+
+
+def _expand_status_paths(status_files: list[dict[str, str]], root: Path) -> list[Path]:
+    paths: list[Path] = []
+    for item in status_files:
+        if item["status"].startswith("D"):
+            continue
+        path_text = item["path"].split(" -> ")[-1].strip('"')
+        target = root / path_text
+        if target.is_dir():
+            paths.extend(sorted(target.rglob("*.md")))
+        elif target.suffix == ".md" and target.exists():
+            paths.append(target)
+    return paths
+
+
+def validate_files(status_files: list[dict[str, str]]) -> dict[str, Any]:
+    """Validate the changed content files before they are committed.
+
+    Front matter, field and date checks only depend on a file's bytes, so they
+    are cached by content hash and every file of the corpus is analyzed through
+    the cache: unchanged files cost a read and a hash. Slug uniqueness and link
+    targets are then checked for the changed files against the whole corpus.
+    """
+    root = settings.blog_root
+    changed = _expand_status_paths(status_files, root)
+    corpus = _content_files(root)
+    changed_set = set(changed)
+
+    cache = _analysis_cache()
+    with ThreadPoolExecutor(max_workers=settings.validation_workers) as pool:
+        results = list(pool.map(lambda file_path: _load(cache, file_path), sorted(changed_set.union(corpus))))
+
+    analyses = {file_path: analysis for file_path, analysis, _ in results}
+    cache_hits = sum(1 for file_path, _, cached in results if cached and file_path in changed_set)
+    targets = _link_targets(corpus, root)
+
+    slugs: dict[tuple[str, str], list[Path]] = {}
+    for file_path, analysis in analyses.items():
+        if file_path.name == "_index.md" or analysis.slug is None:
+            continue
+        section = file_path.relative_to(root / "content").parts[0]
+        slugs.setdefault((section, analysis.slug), []).append(file_path)
+
+    reports: list[dict[str, Any]] = []
+    for file_path in changed:
+        analysis = analyses[file_path]
+        errors = list(analysis.errors)
+        warnings = list(analysis.warnings)
+        relative = file_path.relative_to(root).as_posix()
+
+        if file_path.name != "_index.md" and analysis.slug is not None:
+            section = file_path.relative_to(root / "content").parts[0]
+            clashes = [other for other in slugs.get((section, analysis.slug), []) if other != file_path]
+            if clashes:
+                others = ", ".join(other.relative_to(root).as_posix() for other in clashes)
+                errors.append(_issue("slug.duplicate", f"Slug '{analysis.slug}' is also used by {others}"))
+
+        for link in analysis.links:
+            target = _internal_target(link)
+            if target is None or target in targets or Path(target).name in targets:
+                continue
+            if target.endswith(".md"):
+                errors.append(_issue("link.broken", f"Internal link '{link}' does not match any content file"))
+            elif target.split("/")[1] in TAXONOMIES:
+                continue
+            elif Path(target.rstrip("/")).suffix:
+                if not (root / "static" / target.strip("/")).exists():
+                    warnings.append(_issue("link.static", f"Static file for '{link}' not found in static/"))
+            else:
+                warnings.append(_issue("link.unknown", f"Internal link '{link}' does not match any content page"))
+
+        reports.append({"path": relative, "ok": not errors, "errors": errors, "warnings": warnings})
+
+    return {
+        "ok": all(report["ok"] for report in reports),
+        "checked": len(reports),
+        "cached": cache_hits,
+        "files": reports,
+    }
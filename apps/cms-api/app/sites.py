@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+from fastapi import HTTPException, Path, status
+
+from .config import CURRENT_SITE_ID, SiteConfig, settings
+
+T = TypeVar("T")
+logger = logging.getLogger(__name__)
+
+
+class SiteState:
+    """Locks and lazily built caches of one site.
+
+    Resources (history readers, search index, validation cache...) are created
+    on first use through `resource()` and dropped by `evict()`; anything with a
+    `close()` method is closed on eviction. A resource with a `busy()` method
+    returning True (pending autosaves, running jobs) keeps the site from being
+    evicted, as does work running inside `in_use()`. Resources report their
+    (estimated) size through `memory_bytes()`, which the memory budget uses.
+    """
+
+    def __init__(self, config: SiteConfig) -> None:
+        self.config = config
+        # Reentrant so a router can hold it around a check and the write it guards.
+        self.content_lock = threading.RLock()
+        self.git_lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self._active = 0
+        self._resources: dict[str, Any] = {}
+        self._resources_lock = threading.Lock()
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    @contextmanager
+    def in_use(self, touch: bool = True) -> Iterator[SiteState]:
+        """Keep the site from being evicted while background work runs."""
+        with self._resources_lock:
+            self._active += 1
+        try:
+            yield self
+        finally:
+            with self._resources_lock:
+                self._active -= 1
+            if touch:
+                self.touch()
+
+    def busy(self) -> bool:
+        with self._resources_lock:
+            if self._active:
+                return True
+            resources = list(self._resources.values())
+        return any(callable(getattr(value, "busy", None)) and value.busy() for value in resources)
+
+    def resource(self, name: str, factory: Callable[[SiteConfig], T]) -> T:
+        with self._resources_lock:
+            if name not in self._resources:
+                self._resources[name] = factory(self.config)
+            return self._resources[name]
+
+    def peek(self, name: str) -> Any | None:
+        with self._resources_lock:
+            return self._resources.get(name)
+
+    def evict(self) -> int:
+        with self._resources_lock:
+            resources = list(self._resources.values())
+            self._resources.clear()
+        for value in resources:
+            close = getattr(value, "close", None)
+            if callable(close):
+                close()
+        return len(resources)
+
+    def memory_bytes(self) -> int:
+        with self._resources_lock:
+            resources = list(self._resources.values())
+        return sum(value.memory_bytes() for value in resources if callable(getattr(value, "memory_bytes", None)))
+
+    @property
+    def resource_names(self) -> list[str]:
+        with self._resources_lock:
+            return sorted(self._resources)
+
+
+class SiteRegistry:
+    def __init__(self, configs: dict[str, SiteConfig]) -> None:
+        self.states = {site_id: SiteState(config) for site_id, config in configs.items()}
+
+    def get(self, site_id: str) -> SiteState:
+        state = self.states.get(site_id)
+        if state is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Site not found")
+        return state
+
+    def current(self) -> SiteState:
+        return self.states[CURRENT_SITE_ID.get() or settings.default_site_id]
+
+    def evict_idle(self, idle_seconds: int) -> None:
+        now = time.monotonic()
+        for state in self.states.values():
+            if now - state.last_used > idle_seconds and state.resource_names and not state.busy():
+                state.evict()
+
+    def evict_over_budget(self) -> None:
+        """Drop every cache of a site whose resources outgrew its memory budget."""
+        for site_id, state in self.states.items():
+            budget = state.config.memory_budget_bytes
+            if budget <= 0 or not state.resource_names:
+                continue
+            used = state.memory_bytes()
+            if used > budget and not state.busy():
+                logger.info("Site %s uses ~%d bytes of its %d byte budget; evicting its caches", site_id, used, budget)
+                state.evict()
+
+    def close(self) -> None:
+        for state in self.states.values():
+            state.evict()
+
+
+SITES = SiteRegistry(settings.sites)
+
+
+class SiteEvictor:
+    """Background thread that drops the caches of idle and over-budget sites.
+
+    Closing resources blocks (autosave fsyncs, git processes shutting down),
+    so it never runs on the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        interval = max(min(settings.site_idle_seconds / 4, 30.0), 1.0)
+        while not self._stop.wait(interval):
+            try:
+                SITES.evict_idle(settings.site_idle_seconds)
+                SITES.evict_over_budget()
+            except Exception:  # noqa: BLE001
+                logger.exception("Site eviction failed")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cms-site-evictor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+SITE_EVICTOR = SiteEvictor()
+
+
+def current_site() -> SiteState:
+    return SITES.current()
+
+
+class SiteLock:
+    """Module-level lock name that resolves to the lock of the current site."""
+
+    def __init__(self, attribute: str) -> None:
+        self.attribute = attribute
+
+    def _lock(self) -> Any:
+        return getattr(current_site(), self.attribute)
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._lock().acquire(blocking, timeout)
+
+    def release(self) -> None:
+        self._lock().release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+def _activate(site_id: str) -> None:
+    state = SITES.get(site_id)
+    CURRENT_SITE_ID.set(site_id)
+    state.touch()
+
+
+async def use_site(site_id: str = Path(pattern=r"^[A-Za-z0-9_-]+$")) -> str:
+    # Async on purpose: the context variable must be set in the request task so
+    # that the threadpool running sync endpoints and background tasks inherits it.
+    _activate(site_id)
+    return site_id
+
+
+async def use_default_site() -> str:
+    _activate(settings.default_site_id)
+    return settings.default_site_id
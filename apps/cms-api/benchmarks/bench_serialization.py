@@ -0,0 +1,92 @@
+"""Compare the legacy response path with the trusted orjson path.
+
+Run from `apps/cms-api`:
+
+    python -m benchmarks.bench_serialization
+"""
+from __future__ import annotations
+
+import json
+import timeit
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+
+from app.responses import FastJSONResponse
+from app.schemas import ContentDocument, ContentListResponse
+
+ROUNDS = 200
+
+
+def _document(paragraphs: int) -> dict[str, Any]:
+    body = "\n\n".join(
+        f"Parágrafo {idx}: descobri uma ferramenta em https://example.com/{idx} e anotei tudo aqui." * 4
+        for idx in range(paragraphs)
+    )
+    frontmatter = {"title": "Nota longa", "date": "2025-02-15", "categories": ["llm", "dev-tools"], "draft": False}
+    raw = f"---\ntitle: Nota longa\n---\n\n{body}\n"
+    return {
+        "id": "note/nota-longa.md",
+        "type": "note",
+        "path": "/workspace/blog/content/notes/nota-longa.md",
+        "frontmatter": frontmatter,
+        "body": body,
+        "raw": raw,
+    }
+
+
+def _listing(size: int) -> dict[str, Any]:
+    items = [
+        {
+            "id": f"note/nota-{idx}.md",
+            "type": "note",
+            "path": f"/workspace/blog/content/notes/nota-{idx}.md",
+            "slug": f"nota-{idx}",
+            "title": f"Nota {idx}",
+            "date": "2025-02-15",
+            "draft": False,
+            "updated_at": "2025-02-15T10:00:00+00:00",
+        }
+        for idx in range(size)
+    ]
+    return {"items": items, "page": 1, "page_size": size, "total": size}
+
+
+def _legacy(model: type[Any]) -> Callable[[dict[str, Any]], bytes]:
+    adapter = TypeAdapter(model)
+
+    def render(payload: dict[str, Any]) -> bytes:
+        # Router re-validation, then FastAPI's response_model pass, then stdlib json.
+        instance = model(**payload)
+        validated = adapter.validate_python(instance.model_dump())
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    return render
+
+
+def _trusted(payload: dict[str, Any]) -> bytes:
+    return FastJSONResponse(content=payload).body
+
+
+def _measure(label: str, payload: dict[str, Any], model: type[Any]) -> None:
+    legacy = _legacy(model)
+    legacy_s = min(timeit.repeat(lambda: legacy(payload), number=ROUNDS, repeat=5)) / ROUNDS
+    trusted_s = min(timeit.repeat(lambda: _trusted(payload), number=ROUNDS, repeat=5)) / ROUNDS
+    size_kb = len(_trusted(payload)) / 1024
+    print(
+        f"{label:<28} {size_kb:>8.1f} KiB  legacy {legacy_s * 1e6:>9.1f} us  "
+        f"trusted {trusted_s * 1e6:>9.1f} us  saved {(legacy_s - trusted_s) * 1e6:>9.1f} us/request "
+        f"({legacy_s / trusted_s:.1f}x)"
+    )
+
+
+def main() -> None:
+    for paragraphs in (50, 500, 5000):
+        _measure(f"document ({paragraphs} paragraphs)", _document(paragraphs), ContentDocument)
+    for size in (20, 100):
+        _measure(f"listing ({size} items)", _listing(size), ContentListResponse)
+
+
+if __name__ == "__main__":
+    main()
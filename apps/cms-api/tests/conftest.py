@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read once at import time, so the test site has to be configured
+# before anything imports `app`.
+_ROOT = Path(tempfile.mkdtemp(prefix="cms-tests-"))
+os.environ.update(
+    CMS_BLOG_ROOT=str(_ROOT / "blog"),
+    CMS_DB_PATH=str(_ROOT / "app.db"),
+    CMS_SITES_FILE="",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import get_connection, init_db  # noqa: E402
+
+
+@pytest.fixture()
+def blog_root() -> Path:
+    """Empty content tree and database of the default site."""
+    for section in ("notes", "posts"):
+        directory = settings.blog_root / "content" / section
+        directory.mkdir(parents=True, exist_ok=True)
+        for file_path in directory.glob("*.md"):
+            file_path.unlink()
+    init_db()
+    with get_connection() as conn:
+        conn.execute("DELETE FROM link_checks")
+    return settings.blog_root
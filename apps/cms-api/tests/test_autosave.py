@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.autosave import _apply_deltas
+
+
+def test_offsets_are_utf16_code_units() -> None:
+    # "🙂" is one code point but two UTF-16 code units, as in a JS string.
+    raw = "a🙂b"
+    assert _apply_deltas(raw, [{"start": 3, "end": 4, "text": "c"}]) == "a🙂c"
+    assert _apply_deltas(raw, [{"start": 1, "end": 3, "text": "é"}]) == "aéb"
+
+
+def test_deltas_apply_in_order() -> None:
+    deltas = [{"start": 0, "end": 1, "text": "🙂"}, {"start": 2, "end": 2, "text": "!"}]
+    assert _apply_deltas("ab", deltas) == "🙂!b"
+
+
+@pytest.mark.parametrize("start,end", [(2, 2), (1, 2), (4, 5), (2, 1)])
+def test_rejects_split_pairs_and_out_of_range(start: int, end: int) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        _apply_deltas("a🙂b", [{"start": start, "end": end, "text": "x"}])
+    assert excinfo.value.status_code == 422
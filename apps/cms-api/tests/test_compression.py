@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+
+BODY = {"text": "x" * 200_000}
+
+
+def _client() -> TestClient:
+    api = FastAPI()
+    api.add_middleware(CompressionMiddleware, minimum_size=100, cache_bytes=1024 * 1024)
+
+    @api.get("/doc")
+    def doc() -> dict[str, str]:
+        return BODY
+
+    @api.post("/doc")
+    def save() -> dict[str, str]:
+        return BODY
+
+    return TestClient(api)
+
+
+def test_each_encoding_has_its_own_etag() -> None:
+    client = _client()
+    gzip = client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/doc", headers={"Accept-Encoding": "identity"})
+
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert gzip.json() == BODY
+    assert gzip.headers["etag"].endswith('-gzip"')
+    assert gzip.headers["etag"] != identity.headers["etag"]
+
+    revalidated = client.get("/doc", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip.headers["etag"]})
+    assert revalidated.status_code == 304
+    other_coding = client.get("/doc", headers={"Accept-Encoding": "identity", "If-None-Match": gzip.headers["etag"]})
+    assert other_coding.status_code == 200
+
+
+def test_writes_are_never_answered_with_304() -> None:
+    client = _client()
+    etag = client.get("/doc", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    response = client.post("/doc", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.config import Settings
+
+
+def test_sites_never_inherit_the_default_token(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CMS_GIT_TOKEN", "default-token")
+    sites_file = tmp_path / "sites.yml"
+    sites_file.write_text(
+        "- id: main\n"
+        "  blog_root: /srv/main\n"
+        "  git_remote_url: https://github.com/o/main.git\n"
+        "  git_token: main-token\n"
+        "- id: outro\n"
+        "  blog_root: /srv/outro\n",
+        encoding="utf-8",
+    )
+
+    sites = Settings()._load_sites(str(sites_file))
+
+    assert (sites["main"].git_remote_url, sites["main"].git_token) == ("https://github.com/o/main.git", "main-token")
+    assert (sites["outro"].git_remote_url, sites["outro"].git_token) == ("", "")
+
+
+def test_token_without_remote_url_is_rejected(tmp_path: Path) -> None:
+    sites_file = tmp_path / "sites.yml"
+    sites_file.write_text("- id: broken\n  blog_root: /srv/broken\n  git_token: orphan\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="git_remote_url"):
+        Settings()._load_sites(str(sites_file))
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.responses import FastJSONResponse
+from app.schemas import ContentListResponse
+from app.services.markdown import list_content
+
+
+def test_listing_matches_the_declared_schema(blog_root: Path) -> None:
+    (blog_root / "content" / "notes" / "typed.md").write_text(
+        '---\ntitle: Typed\ndate: 2024-01-02\ndraft: "yes"\n---\nbody\n', encoding="utf-8"
+    )
+    listing = list_content("note", "", 1, 20)
+
+    item = listing["items"][0]
+    assert (item["date"], item["draft"]) == ("2024-01-02", True)
+    ContentListResponse.model_validate(listing, strict=True)
+
+
+def test_unknown_types_are_not_serialized_as_strings() -> None:
+    with pytest.raises(TypeError):
+        FastJSONResponse(content={"value": object()})
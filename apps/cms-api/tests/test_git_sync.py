@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.autosave import get_autosave_store
+from app.services.git_sync import sync_remote
+from app.services.markdown import content_version
+from app.services.search_index import get_search_index
+from app.sites import current_site
+
+NOTE = "---\ntitle: {title}\n---\n{body}\n"
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(repo: Path, name: str, body: str, push: bool = False) -> None:
+    (repo / "content" / "notes" / name).write_text(NOTE.format(title=name, body=body), encoding="utf-8")
+    _git(repo, "add", "--", "content")
+    _git(repo, "commit", "--quiet", "-m", f"edit {name}")
+    if push:
+        _git(repo, "push", "--quiet", "origin", "main")
+
+
+@pytest.fixture()
+def upstream(blog_root: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Turn the test site into a clone of a local bare remote; yields a second clone of it."""
+    for key, value in {
+        "GIT_AUTHOR_NAME": "Tester",
+        "GIT_AUTHOR_EMAIL": "tester@example.com",
+        "GIT_COMMITTER_NAME": "Tester",
+        "GIT_COMMITTER_EMAIL": "tester@example.com",
+    }.items():
+        monkeypatch.setenv(key, value)
+    remote = tmp_path / "remote.git"
+    _git(tmp_path, "init", "--quiet", "--bare", "--initial-branch=main", str(remote))
+    _git(blog_root, "init", "--quiet", "--initial-branch=main")
+    _git(blog_root, "remote", "add", "origin", str(remote))
+    (blog_root / ".gitignore").write_text("static/\n", encoding="utf-8")
+    _git(blog_root, "add", ".gitignore")
+    _commit(blog_root, "a.md", "first version", push=True)
+    other = tmp_path / "other"
+    _git(tmp_path, "clone", "--quiet", str(remote), str(other))
+    try:
+        yield other
+    finally:
+        current_site().evict()
+        shutil.rmtree(blog_root / ".git")
+        (blog_root / ".gitignore").unlink()
+
+
+def test_fast_forward_refreshes_only_the_pulled_documents(blog_root: Path, upstream: Path) -> None:
+    index = get_search_index()
+    index.sync()
+    _commit(upstream, "a.md", "second version")
+    _commit(upstream, "café.md", "accented path", push=True)
+
+    result = sync_remote()
+
+    assert result["status"] == "fast_forwarded"
+    assert (result["ahead"], result["behind"]) == (0, 2)
+    assert sorted(change["id"] for change in result["changes"]) == ["note/a.md", "note/café.md"]
+    assert "second version" in (blog_root / "content" / "notes" / "a.md").read_text(encoding="utf-8")
+    assert "note/café.md" in index._numbers
+    assert sync_remote()["status"] == "up_to_date"
+
+
+def test_local_commits_are_reported_as_ahead(blog_root: Path, upstream: Path) -> None:
+    _commit(blog_root, "a.md", "local only")
+
+    result = sync_remote()
+
+    assert (result["status"], result["ahead"], result["behind"]) == ("ahead", 1, 0)
+    assert _git(blog_root, "rev-parse", "HEAD") == result["old"]
+
+
+def test_diverged_history_is_left_alone(blog_root: Path, upstream: Path) -> None:
+    _commit(blog_root, "a.md", "local version")
+    _commit(upstream, "b.md", "remote version", push=True)
+    head = _git(blog_root, "rev-parse", "HEAD")
+
+    result = sync_remote()
+
+    assert (result["status"], result["ahead"], result["behind"]) == ("diverged", 1, 1)
+    assert _git(blog_root, "rev-parse", "HEAD") == head
+    assert not (blog_root / "content" / "notes" / "b.md").exists()
+
+
+def test_conflicting_dirty_autosave_is_kept_and_reported(blog_root: Path, upstream: Path) -> None:
+    note = blog_root / "content" / "notes" / "a.md"
+    raw = note.read_text(encoding="utf-8")
+    store = get_autosave_store()
+    store.apply("note/a.md", content_version(raw), [{"start": len(raw), "end": len(raw), "text": "unsaved\n"}], "tester")
+    # The file changes behind the working copy (same bytes, new mtime), so the
+    # copy can no longer be flushed and the fast-forward proceeds.
+    stat = note.stat()
+    os.utime(note, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    _commit(upstream, "a.md", "remote version", push=True)
+
+    result = sync_remote()
+
+    assert result["status"] == "fast_forwarded"
+    assert result["conflicts"] == ["note/a.md"]
+    assert "remote version" in note.read_text(encoding="utf-8")
+    assert store.is_dirty("note/a.md")
+    assert store.document("note/a.md") is None
+
+
+def test_flushable_autosave_blocks_a_fast_forward_over_it(blog_root: Path, upstream: Path) -> None:
+    note = blog_root / "content" / "notes" / "a.md"
+    raw = note.read_text(encoding="utf-8")
+    head = _git(blog_root, "rev-parse", "HEAD")
+    get_autosave_store().apply(
+        "note/a.md", content_version(raw), [{"start": len(raw), "end": len(raw), "text": "unsaved\n"}], "tester"
+    )
+    _commit(upstream, "a.md", "remote version", push=True)
+
+    with pytest.raises(HTTPException) as excinfo:
+        sync_remote()
+
+    # The pending edit was written before the merge, which then refuses to overwrite it.
+    assert excinfo.value.status_code == 409
+    assert note.read_text(encoding="utf-8").endswith("unsaved\n")
+    assert _git(blog_root, "rev-parse", "HEAD") == head
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from app.database import get_connection
+from app.services.link_checker import LinkCheckJob, LinkChecker, _run_job, extract_urls, run_link_checks
+from app.sites import current_site
+
+
+def _write_note(blog_root: Path, name: str, body: str) -> None:
+    (blog_root / "content" / "notes" / name).write_text(f"---\ntitle: {name}\n---\n{body}\n", encoding="utf-8")
+
+
+def _counting_transport(calls: Counter[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls[str(request.url)] += 1
+        return httpx.Response(404 if "missing" in request.url.path else 200)
+
+    return httpx.MockTransport(handler)
+
+
+def test_extract_urls_handles_case_and_parentheses() -> None:
+    text = "[wiki](https://en.wikipedia.org/wiki/Foo_(bar)) and (see HTTPS://Example.com/x)."
+    assert extract_urls(text) == ["https://en.wikipedia.org/wiki/Foo_(bar)", "HTTPS://Example.com/x"]
+
+
+def test_results_are_cached_until_their_ttl_expires(blog_root: Path) -> None:
+    _write_note(blog_root, "links.md", "https://example.com/a https://example.com/missing")
+    calls: Counter[str] = Counter()
+    transport = _counting_transport(calls)
+
+    first = asyncio.run(run_link_checks(transport=transport))
+    assert first == {"urls": 2, "checked": 2, "skipped": 0, "broken": 1}
+
+    second = asyncio.run(run_link_checks(transport=transport))
+    assert second == {"urls": 2, "checked": 0, "skipped": 2, "broken": 0}
+    assert sum(calls.values()) == 2
+
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE link_checks SET next_check_at = ? WHERE url = ?",
+            ("2000-01-01T00:00:00+00:00", "https://example.com/missing"),
+        )
+    expired = asyncio.run(run_link_checks(transport=transport))
+    assert expired == {"urls": 2, "checked": 1, "skipped": 1, "broken": 1}
+
+    forced = asyncio.run(run_link_checks(force=True, transport=transport))
+    assert forced["checked"] == 2
+    assert calls["https://example.com/a"] == 2
+
+
+def test_broken_links_expire_sooner_than_healthy_ones(blog_root: Path) -> None:
+    _write_note(blog_root, "links.md", "https://example.com/a https://example.com/missing")
+    asyncio.run(run_link_checks(transport=_counting_transport(Counter())))
+
+    with get_connection() as conn:
+        rows = {row["url"]: row for row in conn.execute("SELECT * FROM link_checks").fetchall()}
+    assert rows["https://example.com/missing"]["status"] == "broken"
+    assert rows["https://example.com/missing"]["next_check_at"] < rows["https://example.com/a"]["next_check_at"]
+
+
+def test_requests_per_host_are_capped() -> None:
+    in_flight: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200)
+
+    urls = [f"https://one.example/{n}" for n in range(6)] + [f"https://two.example/{n}" for n in range(6)]
+    checker = LinkChecker(concurrency=10, per_host=2, timeout=5, transport=httpx.MockTransport(handler))
+    results = asyncio.run(checker.check(urls))
+
+    assert [result["status"] for result in results] == ["ok"] * len(urls)
+    assert peak == {"one.example": 2, "two.example": 2}
+
+
+def test_redirects_and_errors_are_reported() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/old":
+            return httpx.Response(301, headers={"Location": "https://example.com/new"})
+        if path == "/no-head" and request.method == "HEAD":
+            return httpx.Response(405)
+        if path == "/gone":
+            return httpx.Response(410)
+        if path == "/slow":
+            raise httpx.ReadTimeout("timed out", request=request)
+        if path == "/down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200)
+
+    checker = LinkChecker(concurrency=4, per_host=4, timeout=5, transport=httpx.MockTransport(handler))
+    urls = [f"https://example.com/{path}" for path in ("old", "no-head", "gone", "slow", "down")]
+    results = {result["url"]: result for result in asyncio.run(checker.check(urls))}
+
+    redirected = results["https://example.com/old"]
+    assert (redirected["status"], redirected["http_status"], redirected["final_url"]) == ("ok", 200, "https://example.com/new")
+    assert results["https://example.com/no-head"]["http_status"] == 200
+    assert (results["https://example.com/gone"]["status"], results["https://example.com/gone"]["http_status"]) == ("broken", 410)
+    assert (results["https://example.com/slow"]["status"], results["https://example.com/slow"]["error"]) == ("error", "timeout")
+    assert results["https://example.com/down"]["status"] == "error"
+    assert results["https://example.com/down"]["error"] == "connection refused"
+    assert results["https://example.com/down"]["http_status"] is None
+
+
+def _audited_checks() -> int:
+    with get_connection() as conn:
+        return len(conn.execute("SELECT 1 FROM audit_logs WHERE action = 'links.check'").fetchall())
+
+
+def test_link_check_job_reports_progress(blog_root: Path) -> None:
+    _write_note(blog_root, "links.md", "https://example.com/a https://example.com/missing")
+    audited = _audited_checks()
+    job = LinkCheckJob("tester", None, force=False)
+
+    _run_job(current_site(), job, transport=_counting_transport(Counter()))
+
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "done"
+    assert (snapshot["urls"], snapshot["due"], snapshot["checked"], snapshot["broken"]) == (2, 2, 2, 1)
+    assert _audited_checks() == audited + 1
+
+    # A periodic recheck of fresh results probes nothing and is not audited.
+    recheck = LinkCheckJob("system", None, force=False)
+    _run_job(current_site(), recheck, transport=_counting_transport(Counter()), record_empty=False)
+    snapshot = recheck.snapshot()
+    assert (snapshot["status"], snapshot["checked"], snapshot["skipped"]) == ("done", 0, 2)
+    assert _audited_checks() == audited + 1
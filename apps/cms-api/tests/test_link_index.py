@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from app.services.link_index import normalize_url
+
+
+def test_tracking_parameters_are_dropped() -> None:
+    url = "HTTPS://Example.com:443/post/?utm_source=x&UTM_Medium=y&fbclid=1&gclid=2&mc_eid=3&_hsenc=4&b=2&a=1#top"
+    assert normalize_url(url) == "https://example.com/post?a=1&b=2"
+
+
+def test_generic_parameters_are_kept() -> None:
+    assert normalize_url("https://example.com/compare?ref=main&si=2") == "https://example.com/compare?ref=main&si=2"
+    assert normalize_url("https://example.com/a?ref=main") != normalize_url("https://example.com/a?ref=dev")
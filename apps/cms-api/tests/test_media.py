@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from app.services.media import _extension, _matches_signature
+
+
+def test_extension_comes_from_the_declared_type() -> None:
+    assert _extension("image/png") == ".png"
+    assert _extension("application/pdf") == ".pdf"
+    assert _extension("application/x-unknown-thing") == ".bin"
+
+
+def test_contents_must_match_the_declared_type() -> None:
+    assert _matches_signature("image/png", b"\x89PNG\r\n\x1a\n\x00\x00")
+    assert not _matches_signature("image/png", b"<html><script>")
+    assert _matches_signature("image/webp", b"RIFF\x00\x00\x00\x00WEBPVP8 ")
+    assert not _matches_signature("application/pdf", b"<!doctype html>")
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.services.related import RelatedIndex
+
+
+def _write_note(blog_root: Path, name: str, body: str) -> None:
+    (blog_root / "content" / "notes" / name).write_text(f"---\ntitle: {name}\n---\n{body}\n", encoding="utf-8")
+
+
+def test_updates_rebuild_lazily_and_compact_the_vocabulary(blog_root: Path) -> None:
+    _write_note(blog_root, "a.md", "sparse matrix retrieval")
+    _write_note(blog_root, "b.md", "sparse matrix ranking")
+    index = RelatedIndex(blog_root)
+    assert [result["id"] for result in index.similar_to_document("note/a.md", 3)] == ["note/b.md"]
+    matrix = index._matrix
+
+    _write_note(blog_root, "a.md", "sparse matrix zebra")
+    index.update_documents(["note/a.md"])
+    # The update only marks the matrix stale; it is rebuilt by the next query.
+    assert index._matrix is matrix
+    assert "retrieval" in index._vocabulary
+
+    assert [result["id"] for result in index.similar_to_document("note/a.md", 3)] == ["note/b.md"]
+    assert index._matrix is not matrix
+    assert "retrieval" not in index._vocabulary
+    assert sorted(index._vocabulary.values()) == list(range(len(index._vocabulary)))
+    assert index._matrix.shape[1] == len(index._vocabulary)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import orjson
+
+from app.services.search_index import SearchIndex
+
+
+def _write_note(blog_root: Path, name: str, raw: bytes) -> None:
+    (blog_root / "content" / "notes" / name).write_bytes(raw)
+
+
+def test_first_update_without_artifact_indexes_the_whole_tree(blog_root: Path) -> None:
+    shutil.rmtree(blog_root / "static" / "search", ignore_errors=True)
+    for name in ("a.md", "b.md", "c.md"):
+        _write_note(blog_root, name, f"---\ntitle: {name}\n---\nbody of {name}\n".encode())
+
+    SearchIndex(blog_root).update_documents(["note/a.md"])
+
+    manifest = orjson.loads((blog_root / "static" / "search" / "manifest.json").read_bytes())
+    assert sorted(doc["id"] for doc in manifest["docs"] if doc) == ["note/a.md", "note/b.md", "note/c.md"]
+
+
+def test_crlf_and_bom_files_are_not_reindexed(blog_root: Path) -> None:
+    shutil.rmtree(blog_root / "static" / "search", ignore_errors=True)
+    _write_note(blog_root, "crlf.md", b"\xef\xbb\xbf---\r\ntitle: CRLF\r\n---\r\nwindows line endings\r\n")
+
+    assert SearchIndex(blog_root).sync()["updated"] == 1
+    assert SearchIndex(blog_root).sync()["updated"] == 0
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from app.config import settings
+from app.sites import SiteRegistry
+
+
+class _Sized:
+    def __init__(self, size: int, busy: bool = False) -> None:
+        self.size = size
+        self.is_busy = busy
+        self.closed = False
+
+    def memory_bytes(self) -> int:
+        return self.size
+
+    def busy(self) -> bool:
+        return self.is_busy
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _registry(budget: int) -> SiteRegistry:
+    config = replace(settings.sites[settings.default_site_id], memory_budget_bytes=budget)
+    return SiteRegistry({config.id: config})
+
+
+def test_site_over_budget_is_evicted() -> None:
+    registry = _registry(budget=1000)
+    state = registry.states[settings.default_site_id]
+    index = state.resource("index", lambda config: _Sized(600))
+    state.resource("cache", lambda config: _Sized(600))
+
+    assert state.memory_bytes() == 1200
+    registry.evict_over_budget()
+
+    assert state.resource_names == []
+    assert index.closed
+
+
+def test_busy_or_within_budget_sites_are_kept() -> None:
+    registry = _registry(budget=1000)
+    state = registry.states[settings.default_site_id]
+    state.resource("index", lambda config: _Sized(600))
+    registry.evict_over_budget()
+    assert state.resource_names == ["index"]
+
+    state.resource("jobs", lambda config: _Sized(600, busy=True))
+    registry.evict_over_budget()
+    assert state.resource_names == ["index", "jobs"]
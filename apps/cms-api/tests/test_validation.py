@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from app.services.validation import validate_files
+
+REPO_CONTENT = Path(__file__).resolve().parents[3] / "content"
+
+
+def test_repository_content_section_indexes_pass(blog_root: Path) -> None:
+    shutil.rmtree(blog_root / "content")
+    shutil.copytree(REPO_CONTENT, blog_root / "content")
+    changed = [
+        {"status": "M", "path": file_path.relative_to(blog_root).as_posix()}
+        for file_path in sorted((blog_root / "content").rglob("*.md"))
+    ]
+
+    report = validate_files(changed)
+
+    assert report["checked"] == len(changed)
+    reports = {entry["path"]: entry for entry in report["files"]}
+    section_indexes = [path for path in reports if path.endswith("/_index.md")]
+    assert section_indexes
+    assert all(reports[path]["ok"] for path in section_indexes)
+    # Notes pasted without front matter are reported as such, never as missing fields.
+    codes = {error["code"] for entry in reports.values() for error in entry["errors"]}
+    assert codes <= {"frontmatter.missing"}
+
+
+def test_section_index_only_requires_a_title(blog_root: Path) -> None:
+    index = blog_root / "content" / "notes" / "_index.md"
+    index.write_text("---\ndescription: no title\n---\n", encoding="utf-8")
+
+    report = validate_files([{"status": "M", "path": "content/notes/_index.md"}])
+
+    assert [error["code"] for error in report["files"][0]["errors"]] == ["field.missing"]
+    assert "title" in report["files"][0]["errors"][0]["message"]
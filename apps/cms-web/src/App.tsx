@@ -166,7 +166,12 @@ function App() {
       setForm((previous) => ({ ...previous, id: saved.id, type: saved.type }));
       await refreshList(form.type, query);
       await refreshGitStatus();
-      setStatusMessage("Content saved successfully.");
+      const duplicates = saved.duplicate_links ?? [];
+      setStatusMessage(
+        duplicates.length
+          ? `Content saved. Link already used in: ${duplicates.flatMap((item) => item.documents).join(", ")}`
+          : "Content saved successfully."
+      );
     } catch (error) {
       setErrorMessage((error as Error).message);
     } finally {
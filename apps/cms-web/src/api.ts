@@ -37,8 +37,9 @@ async function request<T>(path: string, init: RequestInit = {}): Promise<T> {
   });
 
   if (!response.ok) {
-    const payload = (await response.json().catch(() => ({}))) as { detail?: string };
-    throw new Error(payload.detail ?? `Request failed (${response.status})`);
+    const payload = (await response.json().catch(() => ({}))) as { detail?: string | { message?: string } };
+    const detail = typeof payload.detail === "string" ? payload.detail : payload.detail?.message;
+    throw new Error(detail ?? `Request failed (${response.status})`);
   }
 
   if (response.status === 204) {
@@ -23,6 +23,12 @@ export interface ContentListResponse {
   total: number;
 }
 
+export interface DuplicateLink {
+  url: string;
+  normalized: string;
+  documents: string[];
+}
+
 export interface ContentDocument {
   id: string;
   type: ContentType;
@@ -30,6 +36,7 @@ export interface ContentDocument {
   frontmatter: Record<string, unknown>;
   body: string;
   raw: string;
+  duplicate_links?: DuplicateLink[];
 }
 
 export interface GitStatusItem {